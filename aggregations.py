@@ -0,0 +1,153 @@
+"""
+Time-bucketed aggregation queries for charts
+
+A whole series is fetched with one GROUP BY over the truncated timestamp
+instead of one query per day or month. Buckets without rows are filled with
+zeros in Python (or carried forward, for running totals).
+"""
+from datetime import datetime, date, timedelta
+from sqlalchemy import func, literal, Date
+
+GRANULARITIES = ("day", "week", "month")
+
+def bucket_start(value, granularity):
+    """Truncate a date or datetime to the first day of its bucket (weeks start on Monday)"""
+    day = value.date() if isinstance(value, datetime) else value
+
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+def next_bucket(bucket, granularity):
+    """First day of the bucket following the given bucket start"""
+    if granularity == "day":
+        return bucket + timedelta(days=1)
+    if granularity == "week":
+        return bucket + timedelta(weeks=1)
+    if granularity == "month":
+        return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+def periods_ago(end, periods, granularity):
+    """Start of the bucket that makes a series of `periods` buckets ending at `end`"""
+    bucket = bucket_start(end, granularity)
+    for _ in range(periods - 1):
+        bucket = bucket_start(bucket - timedelta(days=1), granularity)
+    return bucket
+
+def bucket_range(start, end, granularity):
+    """Every bucket start from the bucket containing start to the one containing end"""
+    buckets = []
+    current = bucket_start(start, granularity)
+    last = bucket_start(end, granularity)
+
+    while current <= last:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+def truncate(column, granularity, dialect_name):
+    """SQL expression truncating a timestamp column to its bucket for the given dialect"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    if dialect_name == "postgresql":
+        return func.date_trunc(granularity, column)
+
+    if dialect_name == "sqlite":
+        if granularity == "day":
+            return func.date(column)
+        if granularity == "week":
+            return func.date(column, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-01", column)
+
+    raise ValueError(f"Time bucketing is not supported for {dialect_name}")
+
+def to_date(value):
+    """Normalize a bucket value returned by the driver to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def time_series(db, aggregate, timestamp, start, end, granularity="day", filters=()):
+    """
+    Aggregate per time bucket in a single query
+
+    `aggregate` is an aggregate expression such as func.sum(Order.total_amount)
+    or func.count(Order.id), `timestamp` the DateTime or Date column to bucket
+    on. Returns a list of (bucket_date, value) covering every bucket from start
+    to end inclusive.
+    """
+    buckets = bucket_range(start, end, granularity)
+    range_start = buckets[0]
+    range_end = next_bucket(buckets[-1], granularity)
+    if not isinstance(timestamp.type, Date):
+        range_start = datetime.combine(range_start, datetime.min.time())
+        range_end = datetime.combine(range_end, datetime.min.time())
+
+    bucket = truncate(timestamp, granularity, db.get_bind().dialect.name).label("bucket")
+    rows = db.query(bucket, aggregate).filter(
+        timestamp >= range_start,
+        timestamp < range_end,
+        *filters
+    ).group_by(bucket).all()
+
+    totals = {to_date(row[0]): row[1] or 0 for row in rows}
+    return [(b, totals.get(b, 0)) for b in buckets]
+
+def _not_before(column, value, dialect_name):
+    """SQL expression for the later of column and value"""
+    if dialect_name == "postgresql":
+        return func.greatest(column, value)
+    return func.max(column, value)
+
+def cumulative_series(db, aggregate, timestamp, start, end, granularity="day", filters=(), partition_by=None):
+    """
+    Running total of an aggregate at the end of each bucket, in a single query
+
+    Rows from before `start` are folded into the first bucket, so one GROUP BY
+    with SUM(aggregate) OVER (ORDER BY bucket) yields the totals including all
+    earlier history. Returns a list of (bucket_date, running_total) from start
+    to end inclusive; with `partition_by` (e.g. User.role) returns
+    {partition value: series} with one running total per value.
+    """
+    buckets = bucket_range(start, end, granularity)
+    range_start = buckets[0]
+    range_end = next_bucket(buckets[-1], granularity)
+    if not isinstance(timestamp.type, Date):
+        range_start = datetime.combine(range_start, datetime.min.time())
+        range_end = datetime.combine(range_end, datetime.min.time())
+
+    dialect_name = db.get_bind().dialect.name
+    clamped = _not_before(timestamp, literal(range_start, timestamp.type), dialect_name)
+    bucket = truncate(clamped, granularity, dialect_name).label("bucket")
+    keys = [partition_by] if partition_by is not None else []
+    running = func.sum(aggregate).over(partition_by=keys or None, order_by=bucket)
+
+    rows = db.query(bucket, running, *keys).filter(
+        timestamp < range_end,
+        *filters
+    ).group_by(bucket, *keys).all()
+
+    totals = {}
+    for row in rows:
+        key = row[2] if keys else None
+        totals.setdefault(key, {})[to_date(row[0])] = row[1] or 0
+
+    def carried_forward(by_bucket):
+        series = []
+        total = 0
+        for b in buckets:
+            total = by_bucket.get(b, total)
+            series.append((b, total))
+        return series
+
+    if not keys:
+        return carried_forward(totals.get(None, {}))
+    return {key: carried_forward(by_bucket) for key, by_bucket in totals.items()}
@@ -0,0 +1,289 @@
+"""
+Resilient client for the OpenAI API
+
+Every AI feature goes through AIClient.chat(), which adds to the OpenAI SDK:
+
+- separate connect and read timeouts, and a deadline for the whole call
+  including retries, so a slow provider cannot hold a page spinner forever
+- retries of timeouts, connection errors, 429 and 5xx responses with
+  exponential backoff and full jitter (honouring Retry-After)
+- a circuit breaker that fails fast with AIUnavailableError after
+  AI_BREAKER_THRESHOLD consecutive failures, then lets one trial request
+  through every AI_BREAKER_COOLDOWN seconds until the provider recovers
+- optional hedging: with AI_HEDGE_AFTER set, a duplicate request is sent
+  when the first has not answered within that many seconds, and the first
+  answer wins. Hedged requests are paid for twice, so it is off by default.
+
+Per-attempt latencies are kept in histograms by operation and outcome;
+stats() feeds the System Analytics page. Point AI_BASE_URL at a local stub
+server (e.g. http://127.0.0.1:8089/v1) to exercise all of this offline.
+"""
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+import httpx
+import openai
+from openai import OpenAI
+
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+AI_BASE_URL = os.environ.get("AI_BASE_URL") or None
+CONNECT_TIMEOUT = float(os.environ.get("AI_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("AI_READ_TIMEOUT", "60"))
+DEADLINE = float(os.environ.get("AI_DEADLINE", "120"))
+MAX_RETRIES = int(os.environ.get("AI_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.environ.get("AI_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.environ.get("AI_BACKOFF_MAX", "8"))
+BREAKER_THRESHOLD = int(os.environ.get("AI_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("AI_BREAKER_COOLDOWN", "30"))
+HEDGE_AFTER = float(os.environ.get("AI_HEDGE_AFTER", "0"))
+HEDGE_WORKERS = 32
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Upper bounds in seconds; the last bucket counts everything slower
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+class AIServiceError(Exception):
+    """The AI provider did not produce a response"""
+
+class AIUnavailableError(AIServiceError):
+    """Raised without calling the provider while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. Once `cooldown` seconds
+    have passed it is half-open: one trial call is let through, which closes
+    it on success or reopens it for another cooldown on failure.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or time.monotonic() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """Whether a call may go to the provider now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+class LatencyHistogram(NamedTuple):
+    """Counts of calls per LATENCY_BUCKETS bucket, plus their number and total seconds"""
+    counts: tuple
+    count: int
+    total_seconds: float
+
+    @property
+    def mean(self):
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (inf past the last bound)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+class AIClientStats(NamedTuple):
+    breaker_state: str
+    calls: int
+    retries: int
+    rejected: int
+    hedges: int
+    hedge_wins: int
+    latencies: dict  # (operation, outcome) -> LatencyHistogram
+
+def _describe(error):
+    if isinstance(error, openai.APITimeoutError):
+        return "the AI service timed out"
+    if isinstance(error, openai.APIConnectionError):
+        return "could not reach the AI service"
+    if isinstance(error, openai.APIStatusError):
+        return f"the AI service returned HTTP {error.status_code}"
+    return str(error)
+
+def _is_retryable(error):
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+def _retry_after(error):
+    """Seconds the provider asked us to wait, if it said"""
+    if not isinstance(error, openai.APIStatusError):
+        return None
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, error=None):
+    """Full-jitter exponential backoff before retry number attempt + 1"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    requested = _retry_after(error)
+    if requested is not None:
+        delay = max(delay, min(requested, BACKOFF_MAX))
+    return delay
+
+class AIClient:
+    """Thread-safe wrapper around one OpenAI client; see the module docstring"""
+
+    def __init__(self, api_key=OPENAI_API_KEY, base_url=AI_BASE_URL, max_retries=MAX_RETRIES,
+                 deadline=DEADLINE, hedge_after=HEDGE_AFTER, breaker=None):
+        self._client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            max_retries=0,
+        ) if api_key else None
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self._hedge_pool = None
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "retries": 0, "rejected": 0, "hedges": 0, "hedge_wins": 0}
+        self._histograms = {}
+
+    @property
+    def configured(self):
+        return self._client is not None
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _observe(self, operation, outcome, seconds):
+        with self._lock:
+            counts, count, total = self._histograms.get((operation, outcome), ([0] * (len(LATENCY_BUCKETS) + 1), 0, 0.0))
+            counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self._histograms[(operation, outcome)] = (counts, count + 1, total + seconds)
+
+    def _hedged(self, send):
+        """send(), racing a duplicate started after hedge_after seconds without an answer"""
+        if not self.hedge_after:
+            return send()
+
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="ai-hedge")
+        first = self._hedge_pool.submit(send)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        self._count("hedges")
+        hedge = self._hedge_pool.submit(send)
+        pending = {first, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def chat(self, operation, deadline=None, **params):
+        """
+        chat.completions.create(**params) with timeouts, retries, the circuit
+        breaker and hedging; `operation` labels the latency histograms
+
+        Gives up once `deadline` seconds (default AI_DEADLINE) have passed.
+        Raises AIServiceError, or AIUnavailableError when failing fast.
+        """
+        if self._client is None:
+            raise AIServiceError("AI service not configured")
+
+        self._count("calls")
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise AIUnavailableError("The AI service is temporarily unavailable. Please try again shortly.") from error
+
+            remaining = give_up_at - time.monotonic()
+            timeout = httpx.Timeout(min(READ_TIMEOUT, remaining), connect=min(CONNECT_TIMEOUT, remaining))
+            started = time.perf_counter()
+            try:
+                response = self._hedged(lambda: self._client.chat.completions.create(timeout=timeout, **params))
+            except openai.OpenAIError as e:
+                error = e
+                outcome = "timeout" if isinstance(e, openai.APITimeoutError) else "error"
+                self._observe(operation, outcome, time.perf_counter() - started)
+                if not _is_retryable(e):
+                    # The provider answered, so it is up; the request itself was refused
+                    self.breaker.record_success()
+                    raise AIServiceError(_describe(e)) from e
+                self.breaker.record_failure()
+            except Exception as e:
+                # Anything else (an undecodable body, an unwrapped transport
+                # error) still has to settle a half-open trial, or the
+                # breaker would reject every later call
+                self._observe(operation, "error", time.perf_counter() - started)
+                self.breaker.record_failure()
+                raise AIServiceError(f"unexpected response from the AI service: {e}") from e
+            else:
+                self._observe(operation, "ok", time.perf_counter() - started)
+                self.breaker.record_success()
+                return response
+
+            if attempt == self.max_retries:
+                break
+            delay = backoff_delay(attempt, error)
+            if time.monotonic() + delay >= give_up_at:
+                break
+            self._count("retries")
+            time.sleep(delay)
+
+        raise AIServiceError(f"{_describe(error)} ({attempt + 1} attempt{'s' if attempt else ''})") from error
+
+    def stats(self):
+        with self._lock:
+            latencies = {
+                key: LatencyHistogram(tuple(counts), count, total)
+                for key, (counts, count, total) in self._histograms.items()
+            }
+            return AIClientStats(breaker_state=self.breaker.state, latencies=latencies, **self._counters)
+
+ai_client = AIClient()
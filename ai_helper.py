@@ -1,21 +1,20 @@
-import os
 import json
 import base64
 from io import BytesIO
 from PIL import Image
-from openai import OpenAI
+from ai_client import ai_client, AIServiceError
+from blob_store import placeholder
 
 # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
 # do not change this unless explicitly requested by the user
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 
-def analyze_plant_disease(image_bytes):
+def analyze_plant_disease(image_bytes, timeout=None):
     """
     Analyze plant image for disease detection using AI vision
     Returns detailed information about plant health, diseases, treatments
+    `timeout` (seconds) bounds the call including retries; by default AI_DEADLINE applies
     """
-    if not openai_client:
+    if not ai_client.configured:
         return {
             "error": "AI service not configured. Please add your OpenAI API key.",
             "disease_name": "Service Unavailable",
@@ -48,7 +47,9 @@ Respond with a JSON object containing:
 
 Be specific and professional. If the image is not a plant, indicate that clearly."""
 
-        response = openai_client.chat.completions.create(
+        response = ai_client.chat(
+            "vision",
+            deadline=timeout,
             model="gpt-5",
             messages=[
                 {
@@ -69,24 +70,30 @@ Be specific and professional. If the image is not a plant, indicate that clearly
         result = json.loads(response.choices[0].message.content)
         return result
         
-    except Exception as e:
-        return {
-            "error": str(e),
-            "disease_name": "Analysis Error",
-            "confidence": 0,
-            "severity": "Unknown",
-            "symptoms": f"Error during analysis: {str(e)}",
-            "causes": "Unable to analyze",
-            "treatment": "Please try again or consult an expert",
-            "prevention": "Ensure good image quality",
-            "recommended_products": []
-        }
+    except AIServiceError as e:
+        return analysis_error(str(e))
+    except (ValueError, TypeError):
+        return analysis_error("The AI service returned an unreadable diagnosis")
+
+def analysis_error(message):
+    """Diagnosis placeholder shown when the AI could not analyze the image"""
+    return {
+        "error": message,
+        "disease_name": "Analysis Error",
+        "confidence": 0,
+        "severity": "Unknown",
+        "symptoms": f"Error during analysis: {message}",
+        "causes": "Unable to analyze",
+        "treatment": "Please try again or consult an expert",
+        "prevention": "Ensure good image quality",
+        "recommended_products": []
+    }
 
 def get_agricultural_advice(question, context=""):
     """
     Get AI-powered agricultural advice and recommendations
     """
-    if not openai_client:
+    if not ai_client.configured:
         return "AI assistant is not configured. Please add your OpenAI API key to use this feature."
     
     try:
@@ -105,7 +112,8 @@ Provide practical, actionable advice to farmers. Be specific, clear, and helpful
         if context:
             user_message = f"Context: {context}\n\nQuestion: {question}"
 
-        response = openai_client.chat.completions.create(
+        response = ai_client.chat(
+            "advice",
             model="gpt-5",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -116,12 +124,12 @@ Provide practical, actionable advice to farmers. Be specific, clear, and helpful
         
         return response.choices[0].message.content
         
-    except Exception as e:
+    except AIServiceError as e:
         return f"Error getting advice: {str(e)}"
 
 def search_product_images(product_name):
     """
     Generate or find product images for medications/treatments
-    This is a placeholder - in production, you'd integrate with a product database
+    This is a locally drawn placeholder - in production, you'd integrate with a product database
     """
-    return f"https://via.placeholder.com/300x200?text={product_name.replace(' ', '+')}"
+    return placeholder(product_name)
@@ -0,0 +1,111 @@
+"""
+Vectorized analytics over the Parquet snapshot
+
+Order lines exported by analytics_snapshot are read memory-mapped with only
+the needed columns, pruned by month partition and agrovet row-group
+statistics, and aggregated with pandas. Nothing here touches the database.
+
+Lines belong to the agrovet who sells the product, like daily_sales, and
+revenue counts completed orders only.
+"""
+import os
+from datetime import datetime
+import pandas as pd
+import pyarrow.parquet as pq
+from aggregations import bucket_range, bucket_start
+from analytics_snapshot import SNAPSHOT_DIR, read_manifest
+from database import OrderStatus
+
+DIMENSIONS = {
+    "Product": "product",
+    "Category": "category",
+    "Customer": "customer",
+    "Month": "month",
+}
+
+CATEGORICAL = ["status", "product", "category", "customer"]
+COMPLETED = OrderStatus.COMPLETED.value
+
+def snapshot_time(root=SNAPSHOT_DIR):
+    """When the snapshot was last exported, or None if there is none"""
+    manifest = read_manifest(root)
+    if not manifest or not os.path.isdir(root):
+        return None
+    return datetime.fromisoformat(manifest["exported_at"])
+
+def load_lines(columns, agrovet_id=None, start=None, end=None, root=SNAPSHOT_DIR):
+    """
+    Order lines as a DataFrame, restricted to one agrovet and to the days
+    from start to end inclusive
+
+    Month partitions outside the range are never opened; string columns come
+    back as categoricals.
+    """
+    filters = []
+    if agrovet_id is not None:
+        filters.append(("agrovet_id", "=", agrovet_id))
+    if start is not None:
+        filters.append(("month", ">=", bucket_start(start, "month").strftime("%Y-%m")))
+    if end is not None:
+        filters.append(("month", "<=", bucket_start(end, "month").strftime("%Y-%m")))
+
+    wanted = sorted(set(columns) | ({"created_at"} if start or end else set()))
+    table = pq.read_table(
+        root,
+        columns=wanted,
+        filters=filters or None,
+        memory_map=True,
+        partitioning="hive",
+        read_dictionary=[c for c in CATEGORICAL if c in wanted],
+    )
+    lines = table.to_pandas()
+
+    if start is not None:
+        lines = lines[lines["created_at"] >= pd.Timestamp(bucket_start(start, "day"))]
+    if end is not None:
+        lines = lines[lines["created_at"] < pd.Timestamp(bucket_start(end, "day")) + pd.Timedelta(days=1)]
+    return lines
+
+def completed(lines):
+    return lines[lines["status"] == COMPLETED]
+
+def revenue_series(lines, start, end, granularity="day"):
+    """[(bucket_date, revenue)] of completed lines from start to end, zero-filled"""
+    sales = completed(lines)
+    buckets = bucket_range(start, end, granularity)
+    if granularity == "month":
+        keys = sales["created_at"].dt.to_period("M").dt.start_time.dt.date
+    elif granularity == "week":
+        keys = (sales["created_at"] - pd.to_timedelta(sales["created_at"].dt.weekday, unit="D")).dt.date
+    else:
+        keys = sales["created_at"].dt.date
+    totals = sales["subtotal"].groupby(keys).sum()
+    return [(b, float(totals.get(b, 0.0))) for b in buckets]
+
+def top_products(lines, n=5):
+    """DataFrame of the n best-selling products by units: product_id, product, units"""
+    units = completed(lines).groupby(["product_id", "product"], observed=True)["quantity"].sum()
+    return units.nlargest(n).rename("units").reset_index()
+
+def category_revenue(lines):
+    """Completed revenue per category as a Series (missing category as 'Uncategorized')"""
+    sales = completed(lines)
+    categories = sales["category"].astype(object).fillna("Uncategorized")
+    return sales["subtotal"].groupby(categories).sum()
+
+def slice_by(lines, dimension):
+    """Completed revenue, units and orders per value of a DIMENSIONS column, largest revenue first"""
+    sales = completed(lines)
+    if dimension == "month":
+        key = sales["created_at"].dt.to_period("M").rename("month")
+    else:
+        key = sales[dimension].astype(object).fillna("Unknown")
+    table = sales.groupby(key).agg(
+        revenue=("subtotal", "sum"),
+        units=("quantity", "sum"),
+        orders=("order_id", "nunique"),
+    )
+    if dimension == "month":
+        table.index = table.index.strftime("%Y-%m")
+        return table.sort_index(ascending=False)
+    return table.sort_values("revenue", ascending=False)
@@ -0,0 +1,159 @@
+"""
+Columnar analytics snapshot
+
+Exports order lines (orders joined with order_items, products and the
+customer) to Parquet, one file per month under ANALYTICS_SNAPSHOT_DIR:
+
+    analytics_snapshot/month=2025-06/lines.parquet
+
+Each file is sorted by agrovet so a single shop's reads skip most row
+groups. analytics_engine answers the analytics pages from these files, which
+keeps heavy scans off the database that POS and checkout write to.
+
+Orders change status after they are placed, so every run re-exports the
+current and previous month; the first run and --all export every month.
+Run it periodically (cron, or --interval):
+
+    python analytics_snapshot.py                  # current and previous month
+    python analytics_snapshot.py --all            # every month with orders
+    python analytics_snapshot.py --interval 3600  # repeat hourly
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import func, select
+from database import engine, Order, OrderItem, Product, User
+from aggregations import bucket_range, next_bucket
+
+SNAPSHOT_DIR = os.environ.get("ANALYTICS_SNAPSHOT_DIR", "analytics_snapshot")
+MANIFEST = "_manifest.json"
+FETCH_SIZE = 50000
+ROW_GROUP_SIZE = 32768
+
+SCHEMA = pa.schema([
+    ("order_id", pa.int64()),
+    ("created_at", pa.timestamp("us")),
+    ("status", pa.string()),
+    ("farmer_id", pa.int64()),
+    ("customer", pa.string()),
+    ("product_id", pa.int64()),
+    ("product", pa.string()),
+    ("category", pa.string()),
+    ("agrovet_id", pa.int64()),
+    ("quantity", pa.int32()),
+    ("unit_price", pa.float64()),
+    ("subtotal", pa.float64()),
+])
+
+def month_key(month):
+    return month.strftime("%Y-%m")
+
+def month_path(month, root=SNAPSHOT_DIR):
+    return os.path.join(root, f"month={month_key(month)}", "lines.parquet")
+
+def _lines_query(month):
+    start = datetime.combine(month, datetime.min.time())
+    end = datetime.combine(next_bucket(month, "month"), datetime.min.time())
+    return select(
+        Order.id, Order.created_at, Order.status, Order.farmer_id, User.full_name,
+        OrderItem.product_id, Product.name,
+        # the category the line was sold under ("" when it had none)
+        func.nullif(func.coalesce(OrderItem.category, Product.category), ""), Product.agrovet_id,
+        OrderItem.quantity, OrderItem.unit_price, OrderItem.subtotal
+    ).join(OrderItem, OrderItem.order_id == Order.id).join(
+        Product, OrderItem.product_id == Product.id
+    ).outerjoin(User, User.id == Order.farmer_id).where(
+        Order.created_at >= start,
+        Order.created_at < end
+    ).order_by(Product.agrovet_id, Order.created_at, Order.id)
+
+def _batch(rows):
+    columns = list(zip(*rows))
+    columns[2] = [status.value if status is not None else None for status in columns[2]]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, SCHEMA)],
+        schema=SCHEMA
+    )
+
+def export_month(month, root=SNAPSHOT_DIR):
+    """Write one month of order lines to Parquet; returns the number of lines"""
+    path = month_path(month, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".tmp"
+
+    lines = 0
+    with engine.connect() as conn, pq.ParquetWriter(partial, SCHEMA, compression="zstd") as writer:
+        result = conn.execution_options(stream_results=True, yield_per=FETCH_SIZE).execute(_lines_query(month))
+        for rows in result.partitions():
+            writer.write_batch(_batch(rows), row_group_size=ROW_GROUP_SIZE)
+            lines += len(rows)
+
+    # Readers only ever see a complete file
+    os.replace(partial, path)
+    return lines
+
+def order_months():
+    """First day of every month from the oldest order to the current month"""
+    with engine.connect() as conn:
+        first = conn.execute(select(func.min(Order.created_at))).scalar()
+    today = datetime.utcnow().date()
+    if first is None:
+        return [today.replace(day=1)]
+    return bucket_range(first.date(), today, "month")
+
+def read_manifest(root=SNAPSHOT_DIR):
+    """{"exported_at": ISO timestamp, "months": {"YYYY-MM": lines}}, or None before the first export"""
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_manifest(months, root):
+    manifest = read_manifest(root) or {"months": {}}
+    manifest["months"].update(months)
+    manifest["exported_at"] = datetime.utcnow().isoformat(timespec="seconds")
+    partial = os.path.join(root, MANIFEST + ".tmp")
+    with open(partial, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial, os.path.join(root, MANIFEST))
+
+def export(months, root=SNAPSHOT_DIR):
+    exported = {}
+    for month in months:
+        started = time.perf_counter()
+        exported[month_key(month)] = export_month(month, root)
+        print(f"  {month_key(month)}: {exported[month_key(month)]} lines in {time.perf_counter() - started:.1f}s")
+    _write_manifest(exported, root)
+
+def recent_months(today=None):
+    """The current and previous month, whose orders may still change status"""
+    today = today or datetime.utcnow().date()
+    current = today.replace(day=1)
+    previous = (current - timedelta(days=1)).replace(day=1)
+    return [previous, current]
+
+def main():
+    parser = argparse.ArgumentParser(description="Export order lines to monthly Parquet files for analytics")
+    parser.add_argument("--all", action="store_true", help="re-export every month that has orders")
+    parser.add_argument("--interval", type=int, help="repeat every INTERVAL seconds")
+    parser.add_argument("--output", default=SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args()
+
+    while True:
+        full = args.all or read_manifest(args.output) is None
+        months = order_months() if full else recent_months()
+        print(f"Exporting {len(months)} month(s) to {args.output}...")
+        export(months, args.output)
+        print("✅ Analytics snapshot updated")
+        if not args.interval:
+            break
+        args.all = False
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import streamlit as st
 import os
-from database import init_db, SessionLocal, UserRole
+from database import init_db, session_scope, UserRole
 from auth import authenticate_user, create_user
+from query_stats import track_rerun
 import importlib
 
 st.set_page_config(
@@ -11,9 +12,13 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-if 'db' not in st.session_state:
+@st.cache_resource
+def initialize_database():
+    """Create tables once per server process rather than once per browser session"""
     init_db()
-    st.session_state.db = SessionLocal()
+    return True
+
+initialize_database()
 
 if 'user' not in st.session_state:
     st.session_state.user = None
@@ -30,6 +35,19 @@ def logout():
     st.session_state.page = 'home'
     st.rerun()
 
+def show_query_stats(stats):
+    """Admin-only sidebar panel with the database work of the current rerun"""
+    max_queries, max_ms = stats.budget
+    with st.sidebar.expander("🛠️ Query Stats", expanded=stats.over_budget):
+        st.caption(f"Page: {stats.page}")
+        st.write(f"**Queries:** {stats.count} / {max_queries}")
+        st.write(f"**DB time:** {stats.total_ms:.1f} ms / {max_ms} ms")
+        if stats.over_budget:
+            st.warning("Over budget for this page")
+        for statement, ms in stats.slowest():
+            st.caption(f"{ms:.1f} ms")
+            st.code(statement, language="sql")
+
 st.markdown("""
 <style>
     .main-header {
@@ -157,66 +175,75 @@ with st.sidebar:
         if st.button("📝 Register", key="nav_register", use_container_width=True):
             set_page('register')
 
-if st.session_state.page == 'home':
-    from pages import home
-    home.show()
-elif st.session_state.page == 'login':
-    from pages import login
-    login.show()
-elif st.session_state.page == 'register':
-    from pages import register
-    register.show()
-elif st.session_state.page == 'farmer_dashboard':
-    from pages import farmer_dashboard
-    farmer_dashboard.show()
-elif st.session_state.page == 'disease_detection':
-    from pages import disease_detection
-    disease_detection.show()
-elif st.session_state.page == 'marketplace':
-    from pages import marketplace
-    marketplace.show()
-elif st.session_state.page == 'my_orders':
-    from pages import my_orders
-    my_orders.show()
-elif st.session_state.page == 'community':
-    from pages import community
-    community.show()
-elif st.session_state.page == 'ai_assistant':
-    from pages import ai_assistant
-    ai_assistant.show()
-elif st.session_state.page == 'weather':
-    from pages import weather
-    weather.show()
-elif st.session_state.page == 'agrovet_dashboard':
-    from pages import agrovet_dashboard
-    agrovet_dashboard.show()
-elif st.session_state.page == 'pos_system':
-    from pages import pos_system
-    pos_system.show()
-elif st.session_state.page == 'agrovet_orders':
-    from pages import agrovet_orders
-    agrovet_orders.show()
-elif st.session_state.page == 'inventory':
-    from pages import inventory
-    inventory.show()
-elif st.session_state.page == 'crm':
-    from pages import crm
-    crm.show()
-elif st.session_state.page == 'analytics':
-    from pages import analytics
-    analytics.show()
-elif st.session_state.page == 'admin_dashboard':
-    from pages import admin_dashboard
-    admin_dashboard.show()
-elif st.session_state.page == 'user_management':
-    from pages import user_management
-    user_management.show()
-elif st.session_state.page == 'all_orders':
-    from pages import all_orders
-    all_orders.show()
-elif st.session_state.page == 'all_products':
-    from pages import all_products
-    all_products.show()
-elif st.session_state.page == 'system_analytics':
-    from pages import system_analytics
-    system_analytics.show()
+# Each rerun works against its own session; the connection goes back to the
+# pool when the script finishes, including when it stops early via st.rerun().
+# track_rerun() records the statements it runs for the query budget log.
+with session_scope() as db, track_rerun(st.session_state.page) as query_stats:
+    st.session_state.db = db
+    
+    if st.session_state.page == 'home':
+        from pages import home
+        home.show()
+    elif st.session_state.page == 'login':
+        from pages import login
+        login.show()
+    elif st.session_state.page == 'register':
+        from pages import register
+        register.show()
+    elif st.session_state.page == 'farmer_dashboard':
+        from pages import farmer_dashboard
+        farmer_dashboard.show()
+    elif st.session_state.page == 'disease_detection':
+        from pages import disease_detection
+        disease_detection.show()
+    elif st.session_state.page == 'marketplace':
+        from pages import marketplace
+        marketplace.show()
+    elif st.session_state.page == 'my_orders':
+        from pages import my_orders
+        my_orders.show()
+    elif st.session_state.page == 'community':
+        from pages import community
+        community.show()
+    elif st.session_state.page == 'ai_assistant':
+        from pages import ai_assistant
+        ai_assistant.show()
+    elif st.session_state.page == 'weather':
+        from pages import weather
+        weather.show()
+    elif st.session_state.page == 'agrovet_dashboard':
+        from pages import agrovet_dashboard
+        agrovet_dashboard.show()
+    elif st.session_state.page == 'pos_system':
+        from pages import pos_system
+        pos_system.show()
+    elif st.session_state.page == 'agrovet_orders':
+        from pages import agrovet_orders
+        agrovet_orders.show()
+    elif st.session_state.page == 'inventory':
+        from pages import inventory
+        inventory.show()
+    elif st.session_state.page == 'crm':
+        from pages import crm
+        crm.show()
+    elif st.session_state.page == 'analytics':
+        from pages import analytics
+        analytics.show()
+    elif st.session_state.page == 'admin_dashboard':
+        from pages import admin_dashboard
+        admin_dashboard.show()
+    elif st.session_state.page == 'user_management':
+        from pages import user_management
+        user_management.show()
+    elif st.session_state.page == 'all_orders':
+        from pages import all_orders
+        all_orders.show()
+    elif st.session_state.page == 'all_products':
+        from pages import all_products
+        all_products.show()
+    elif st.session_state.page == 'system_analytics':
+        from pages import system_analytics
+        system_analytics.show()
+
+if st.session_state.user and st.session_state.user.role == UserRole.ADMIN:
+    show_query_stats(query_stats)
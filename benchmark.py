@@ -0,0 +1,223 @@
+"""
+Page benchmark suite
+
+Renders each data page with Streamlit's AppTest against generated small,
+medium and large SQLite databases and records, per page, the wall time of a
+rerun, the SQL statement count and DB time, and peak Python memory. Pages
+fetch and render in the same function, so the statement count and DB time
+are what isolate the data layer.
+
+Databases are generated once with generate_data.py into bench_data/ and
+reused. Each size runs in its own process because the engine is bound to
+DATABASE_URL at import. Results are written as JSON and can be compared with
+an earlier run:
+
+    python benchmark.py --sizes small medium --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT, "bench_data")
+SIZES = ["small", "medium", "large"]
+
+# page -> role of the user who views it
+PAGES = {
+    "farmer_dashboard": "farmer",
+    "marketplace": "farmer",
+    "my_orders": "farmer",
+    "community": "farmer",
+    "agrovet_dashboard": "agrovet",
+    "pos_system": "agrovet",
+    "agrovet_orders": "agrovet",
+    "inventory": "agrovet",
+    "crm": "agrovet",
+    "analytics": "agrovet",
+    "admin_dashboard": "admin",
+    "user_management": "admin",
+    "all_orders": "admin",
+    "all_products": "admin",
+    "system_analytics": "admin",
+}
+
+PAGE_TIMEOUT = 900
+
+def database_url(size):
+    return f"sqlite:///{os.path.join(DATA_DIR, size + '.db')}"
+
+def ensure_dataset(size):
+    """Generate the dataset for size unless it already exists"""
+    path = os.path.join(DATA_DIR, f"{size}.db")
+    if os.path.exists(path):
+        return
+    os.makedirs(DATA_DIR, exist_ok=True)
+    print(f"Generating {size} dataset...")
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "generate_data.py"), "--size", size],
+        env={**os.environ, "DATABASE_URL": database_url(size)},
+        cwd=ROOT,
+        check=True
+    )
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def busiest_users():
+    """The farmer and agrovet with the most orders, and an admin (created if missing)"""
+    from sqlalchemy import func
+    from database import SessionLocal, User, UserRole, Order
+    from auth import hash_password
+
+    db = SessionLocal()
+    try:
+        farmer_id = db.query(Order.farmer_id).group_by(Order.farmer_id).order_by(func.count().desc()).limit(1).scalar()
+        agrovet_id = db.query(Order.agrovet_id).filter(Order.agrovet_id.isnot(None)).group_by(
+            Order.agrovet_id).order_by(func.count().desc()).limit(1).scalar()
+
+        admin = db.query(User).filter(User.role == UserRole.ADMIN).first()
+        if admin is None:
+            admin = User(username="bench_admin", email="bench_admin@example.com", password_hash=hash_password("demo123"),
+                         full_name="Benchmark Admin", role=UserRole.ADMIN, is_active=True)
+            db.add(admin)
+            db.commit()
+
+        return {
+            "farmer": db.get(User, farmer_id) if farmer_id else db.query(User).filter(User.role == UserRole.FARMER).first(),
+            "agrovet": db.get(User, agrovet_id) if agrovet_id else db.query(User).filter(User.role == UserRole.AGROVET).first(),
+            "admin": admin,
+        }
+    finally:
+        db.close()
+
+def run_page(page, user):
+    """One rerun of page as user; returns the AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=PAGE_TIMEOUT)
+    at.session_state["user"] = user
+    at.session_state["page"] = page
+    at.run()
+    return at
+
+def benchmark_page(page, user, repeat):
+    """Wall time, statements, DB time and peak memory of rendering page"""
+    from database import engine
+    from query_stats import count_queries
+
+    run_page(page, user)  # warm imports and caches
+
+    walls, counts, db_times = [], [], []
+    errors = []
+    for _ in range(repeat):
+        with count_queries(engine) as counter:
+            started = time.perf_counter()
+            at = run_page(page, user)
+            walls.append((time.perf_counter() - started) * 1000)
+        counts.append(counter.count)
+        db_times.append(counter.total_ms)
+        errors = [e.value for e in at.exception]
+
+    # Memory is measured in a separate run because tracing slows everything down
+    tracemalloc.start()
+    run_page(page, user)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "wall_ms": round(statistics.median(walls), 1),
+        "wall_ms_min": round(min(walls), 1),
+        "statements": max(counts),
+        "db_ms": round(statistics.median(db_times), 1),
+        "peak_kb": round(peak / 1024),
+        "errors": errors,
+    }
+
+def worker(size, pages, repeat, output):
+    """Benchmark pages against the database configured in DATABASE_URL"""
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    users = busiest_users()
+
+    results = {}
+    for page in pages:
+        result = benchmark_page(page, users[PAGES[page]], repeat)
+        results[page] = result
+        status = "error" if result["errors"] else "ok"
+        print(f"  {size:7s} {page:20s} {result['wall_ms']:9.1f} ms {result['statements']:6d} statements "
+              f"{result['db_ms']:9.1f} ms DB {result['peak_kb']:8d} KB peak  {status}")
+
+    with open(output, "w") as f:
+        json.dump(results, f)
+
+def compare(current, baseline_path):
+    """Print wall time and statement count changes against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\nCompared with {baseline_path} ({baseline.get('commit')}):")
+    for size, pages in current["results"].items():
+        for page, result in pages.items():
+            before = baseline.get("results", {}).get(size, {}).get(page)
+            if not before:
+                continue
+            ratio = result["wall_ms"] / before["wall_ms"] if before["wall_ms"] else float("inf")
+            print(f"  {size:7s} {page:20s} {before['wall_ms']:9.1f} -> {result['wall_ms']:9.1f} ms ({ratio:5.2f}x)  "
+                  f"{before['statements']:6d} -> {result['statements']:6d} statements")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page data access against generated datasets")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=SIZES)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="timed reruns per page")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="earlier results to compare against")
+    parser.add_argument("--worker", choices=SIZES, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.pages, args.repeat, args.worker_output)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": {},
+    }
+
+    for size in args.sizes:
+        ensure_dataset(size)
+        worker_output = os.path.join(DATA_DIR, f"{size}.results.json")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", size, "--worker-output", worker_output,
+             "--repeat", str(args.repeat), "--pages", *args.pages],
+            env={**os.environ, "DATABASE_URL": database_url(size), "SLOW_QUERY_LOG": os.devnull},
+            cwd=ROOT,
+            check=True
+        )
+        with open(worker_output) as f:
+            report["results"][size] = json.load(f)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Content-addressed image store on local disk
+
+Images are stored once under the SHA-256 of their bytes, in two levels of
+sharded directories so no directory grows huge:
+
+    blob_store/ab/cd/abcd1234...            original
+    blob_store/ab/cd/abcd1234....thumb.webp  thumbnail variants, made at write time
+    blob_store/ab/cd/abcd1234....thumb.jpg
+
+Database columns (DiseaseDetection.image_path, CommunityPost.image_url,
+Product.image_url) hold a "blob:<sha256>" reference. Pages pass
+image_source() to st.image, which serves the small variant from disk.
+Placeholders are drawn locally and stored the same way, so rendering never
+fetches anything from the network.
+"""
+import hashlib
+import os
+import tempfile
+from contextlib import suppress
+from functools import lru_cache
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+BLOB_STORE_DIR = os.environ.get("BLOB_STORE_DIR", "blob_store")
+REF_PREFIX = "blob:"
+
+# variant -> longest edge in pixels
+VARIANTS = {
+    "thumb": 320,
+    "card": 640,
+}
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 80, "optimize": True, "progressive": True}),
+}
+DEFAULT_FORMAT = "webp"
+
+PLACEHOLDER_BACKGROUND = (220, 252, 231)
+PLACEHOLDER_TEXT = (22, 101, 52)
+
+def _blob_path(digest, suffix="", root=None):
+    root = root or BLOB_STORE_DIR
+    return os.path.join(root, digest[:2], digest[2:4], digest + suffix)
+
+def _write_atomic(path, data):
+    """
+    Write via a private temporary file, so readers never see a partial blob
+    and concurrent writers of the same blob cannot move each other's file
+    """
+    if os.path.exists(path):
+        return
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(partial)
+        raise
+
+def _encode(image, fmt):
+    name, options = FORMATS[fmt]
+    output = BytesIO()
+    image.save(output, format=name, **options)
+    return output.getvalue()
+
+def _decode(data):
+    """Upright RGB (or grayscale) image; raises ValueError if data is not a readable image"""
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+        image = ImageOps.exif_transpose(image)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Could not read image: {e}") from e
+
+    if image.mode not in ("RGB", "L"):
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    return image
+
+def _write_variants(digest, image, root):
+    for variant, edge in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        for fmt in FORMATS:
+            _write_atomic(_blob_path(digest, f".{variant}.{fmt}", root), _encode(resized, fmt))
+
+def put(data, root=None):
+    """
+    Store image bytes and their variants; returns the "blob:<sha256>" reference
+
+    Storing bytes that are already present is a no-op, so identical uploads
+    share one copy. Raises ValueError if data is not a readable image; disk
+    failures propagate as OSError.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest, root=root)
+    if not os.path.exists(path):
+        image = _decode(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_variants(digest, image, root)
+        # The original is written last: its presence means the variants exist
+        _write_atomic(path, data)
+    return REF_PREFIX + digest
+
+def is_ref(value):
+    return bool(value) and value.startswith(REF_PREFIX)
+
+def path(ref, variant=None, fmt=DEFAULT_FORMAT, root=None):
+    """Path on disk of a stored image, or of one of its VARIANTS"""
+    digest = ref[len(REF_PREFIX):]
+    if variant is None:
+        return _blob_path(digest, root=root)
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown image variant: {variant}")
+    return _blob_path(digest, f".{variant}.{fmt}", root)
+
+def get(ref, variant=None, fmt=DEFAULT_FORMAT, root=None):
+    with open(path(ref, variant, fmt, root), "rb") as f:
+        return f.read()
+
+def _wrap(draw, text, font, width):
+    lines = []
+    for word in text.split():
+        if lines and draw.textlength(f"{lines[-1]} {word}", font=font) <= width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return "\n".join(lines[:3])
+
+@lru_cache(maxsize=1024)
+def placeholder(text, size=(320, 240)):
+    """Path of a locally drawn placeholder image showing text (stored once per text and size)"""
+    image = Image.new("RGB", size, PLACEHOLDER_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=max(14, size[1] // 10))
+    label = _wrap(draw, text, font, size[0] * 0.85)
+    draw.multiline_text((size[0] / 2, size[1] / 2), label, fill=PLACEHOLDER_TEXT, font=font, anchor="mm", align="center")
+    return path(put(_encode(image, "jpg")), "thumb")
+
+def image_source(value, variant="thumb", fallback_text=None):
+    """
+    What to hand to st.image for a stored image column
+
+    Blob references resolve to the variant on disk, other values (external
+    URLs) pass through, and empty values get a local placeholder when
+    fallback_text is given (otherwise None).
+    """
+    if is_ref(value):
+        return path(value, variant)
+    if value:
+        return value
+    if fallback_text is not None:
+        return placeholder(fallback_text)
+    return None
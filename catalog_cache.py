@@ -0,0 +1,81 @@
+"""
+Process-wide marketplace catalog cache
+
+Pages of the active catalog and search results are cached with
+st.cache_data, shared by every session of the server process and keyed by a
+catalog version. Pages that change products (inventory edits, POS sales,
+marketplace orders) call bump_catalog_version() right after committing, so
+the next read misses the cache and shows current stock. Between writes,
+browsing and re-rendering the marketplace costs no queries.
+
+The version lives in this process. Writes made by another process (a second
+app instance or a script) are picked up when entries expire after
+CATALOG_CACHE_TTL seconds; checkout reserves stock in the database, so a
+briefly stale listing can never oversell.
+"""
+import os
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional
+import streamlit as st
+from database import Product, session_scope
+from pagination import keyset_page
+from product_search import search as search_products, RESULT_LIMIT
+
+CACHE_TTL = int(os.environ.get("CATALOG_CACHE_TTL", "300"))
+MAX_ENTRIES = 512
+
+_version = 0
+_version_lock = threading.Lock()
+
+class CatalogProduct(NamedTuple):
+    """Read-only copy of the Product fields the marketplace shows"""
+    id: int
+    name: str
+    description: Optional[str]
+    category: Optional[str]
+    price: float
+    stock_quantity: int
+    image_url: Optional[str]
+    manufacturer: Optional[str]
+    agrovet_id: Optional[int]
+    created_at: Optional[datetime]
+
+def _snapshot(product):
+    return CatalogProduct(*(getattr(product, field) for field in CatalogProduct._fields))
+
+def catalog_version():
+    """Current catalog version of this process"""
+    return _version
+
+def bump_catalog_version():
+    """Invalidate cached catalog reads; call after committing any product or stock change"""
+    global _version
+    with _version_lock:
+        _version += 1
+
+def _available_products(db, category):
+    query = db.query(Product).filter(Product.is_active == True, Product.stock_quantity > 0)
+    if category != "All":
+        query = query.filter(Product.category == category)
+    return query
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _catalog_page(version, category, page_size, after):
+    with session_scope() as db:
+        products, next_cursor = keyset_page(_available_products(db, category), Product, page_size, after)
+        return [_snapshot(p) for p in products], next_cursor
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _catalog_search(version, category, term):
+    with session_scope() as db:
+        products = search_products(_available_products(db, category), term).limit(RESULT_LIMIT).all()
+        return [_snapshot(p) for p in products]
+
+def catalog_page(category, page_size, after=None):
+    """One keyset page of available products in category ("All" for every category)"""
+    return _catalog_page(catalog_version(), category, page_size, after)
+
+def search_catalog(category, term):
+    """Best RESULT_LIMIT available products in category matching term"""
+    return _catalog_search(catalog_version(), category, term)
@@ -0,0 +1,113 @@
+"""
+Checkout: stock reservation and order creation
+
+Stock is reserved with a single conditional UPDATE covering every line of a
+basket: each product is decremented only if it still has enough stock, and the
+database checks that atomically per row. If any line cannot be filled the
+caller rolls back, so two terminals selling the last unit at the same moment
+cannot both succeed.
+
+create_order() then writes the order and all of its lines with one INSERT
+each, so a checkout takes the same number of round trips for 1 line or 100.
+Each line records the product's category at the time of sale, which keys it
+in the daily_sales rollup however the product is edited later.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import update, select, insert, case
+from database import Product, Order, OrderItem
+from sales_rollup import record_status_change
+
+class OutOfStockError(Exception):
+    """Raised when one or more basket lines exceed the available stock"""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        details = ", ".join(f"{name} ({available} left)" for name, available in shortages)
+        super().__init__(f"Not enough stock for: {details}")
+
+def basket_quantities(lines):
+    """Total quantity per product id from cart lines ({'id': ..., 'quantity': ...})"""
+    quantities = defaultdict(int)
+    for line in lines:
+        quantities[line['id']] += line['quantity']
+    return dict(quantities)
+
+def reserve_stock(db, quantities):
+    """
+    Decrement stock for every product in quantities ({product_id: qty}) in one UPDATE
+
+    Returns {product_id: category} as of the reservation. Raises
+    OutOfStockError if any product is inactive, missing or short of stock;
+    nothing has been committed at that point and the caller must roll back
+    the session.
+    """
+    if not quantities:
+        return {}
+
+    ids = sorted(quantities)
+    wanted = case(quantities, value=Product.id)
+
+    # Lock the rows in id order so concurrent baskets sharing products queue
+    # up instead of deadlocking (FOR UPDATE is a no-op on SQLite, where the
+    # write lock already serializes checkouts).
+    locked = select(Product.id).where(Product.id.in_(ids)).order_by(Product.id).with_for_update()
+
+    reserved = dict(db.execute(
+        update(Product).where(
+            Product.id.in_(locked),
+            Product.is_active == True,
+            Product.stock_quantity >= wanted
+        ).values(stock_quantity=Product.stock_quantity - wanted).returning(Product.id, Product.category),
+        execution_options={"synchronize_session": "fetch"}
+    ).all())
+
+    if len(reserved) != len(ids):
+        raise OutOfStockError(_shortages(db, [i for i in ids if i not in reserved]))
+    return reserved
+
+def _shortages(db, product_ids):
+    """(name, available) for products whose line could not be reserved"""
+    products = db.query(Product.id, Product.name, Product.stock_quantity, Product.is_active).filter(
+        Product.id.in_(product_ids)
+    ).all()
+    found = {p.id: p for p in products}
+
+    shortages = []
+    for product_id in product_ids:
+        product = found.get(product_id)
+        if product is None:
+            shortages.append((f"Product #{product_id}", 0))
+        else:
+            shortages.append((product.name, product.stock_quantity if product.is_active else 0))
+    return shortages
+
+def create_order(db, lines, **order_fields):
+    """
+    Reserve stock and insert an order with all its lines; returns the new order id
+
+    `lines` are cart lines ({'id', 'price', 'quantity'}), `order_fields` the
+    Order columns (farmer_id, status, total_amount, ...). Raises
+    OutOfStockError before anything is written if stock is short. The caller
+    commits, or rolls back on error.
+    """
+    categories = reserve_stock(db, basket_quantities(lines))
+
+    order = Order(created_at=datetime.utcnow(), **order_fields)
+    db.add(order)
+    db.flush()
+
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": order.id,
+            "product_id": line['id'],
+            "quantity": line['quantity'],
+            "unit_price": line['price'],
+            "subtotal": line['quantity'] * line['price'],
+            "category": categories[line['id']] or "",
+        }
+        for line in lines
+    ])
+
+    record_status_change(db, order, None)
+    return order.id
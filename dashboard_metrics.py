@@ -0,0 +1,158 @@
+"""
+Headline numbers for the dashboards
+
+Each summary is built from one GROUP BY status query over orders plus one or
+two aggregate queries that use conditional SUM(CASE ...) columns (and scalar
+subqueries for counts from other tables), instead of a COUNT query per card
+or per enum value. Results are plain NamedTuples, so pages read fields
+rather than indexing rows.
+"""
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+from sqlalchemy import case, false, func, select
+from database import CommunityPost, DailySales, DiseaseDetection, Order, OrderStatus, Product, User, UserRole
+
+LOW_STOCK_THRESHOLD = 10
+
+class StatusTotals(NamedTuple):
+    """Orders in one status: how many, their value, and those placed since the summary's cut-off"""
+    count: int = 0
+    amount: float = 0.0
+    recent_count: int = 0
+    recent_amount: float = 0.0
+
+class OrderCounts(NamedTuple):
+    """Per-status order totals"""
+    by_status: dict
+
+    def __getitem__(self, status):
+        return self.by_status.get(status, StatusTotals())
+
+    @property
+    def total(self):
+        return sum(totals.count for totals in self.by_status.values())
+
+    @property
+    def recent(self):
+        return sum(totals.recent_count for totals in self.by_status.values())
+
+    @property
+    def pending(self):
+        return self[OrderStatus.PENDING].count
+
+    def distribution(self):
+        """{status label: order count} of the statuses that have orders, in enum order"""
+        return {status.value.title(): self[status].count for status in OrderStatus if self[status].count}
+
+class FarmerSummary(NamedTuple):
+    orders: OrderCounts
+    total_scans: int
+    scans_this_week: int
+
+class AgrovetSummary(NamedTuple):
+    orders: OrderCounts
+    total_products: int
+    total_revenue: float
+    month_revenue: float
+
+    @property
+    def average_order(self):
+        return self.total_revenue / self.orders.total if self.orders.total else 0
+
+class AdminSummary(NamedTuple):
+    """System-wide numbers; "today" fields count rows created since midnight UTC"""
+    orders: OrderCounts
+    active_users_by_role: dict
+    new_users_today: int
+    active_products: int
+    low_stock_products: int
+    total_posts: int
+    total_scans: int
+
+    @property
+    def active_users(self):
+        return sum(self.active_users_by_role.values())
+
+    def role_distribution(self):
+        """{role label: active users} of the roles that have users, in enum order"""
+        return {role.value.title(): self.active_users_by_role[role]
+                for role in UserRole if self.active_users_by_role.get(role)}
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def _sum_if(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+def _count_of(model, *filters):
+    return select(func.count(model.id)).where(*filters).scalar_subquery()
+
+def order_counts(db, *filters, since=None):
+    """Order totals per status for orders matching filters, in one GROUP BY status query"""
+    recent = Order.created_at >= since if since is not None else false()
+    rows = db.query(
+        Order.status,
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.total_amount), 0),
+        _count_if(recent),
+        _sum_if(recent, Order.total_amount)
+    ).filter(*filters).group_by(Order.status).all()
+
+    return OrderCounts({
+        status: StatusTotals(count, float(amount), recent_count, float(recent_amount))
+        for status, count, amount, recent_count, recent_amount in rows
+    })
+
+def farmer_summary(db, farmer_id):
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    total_scans, scans_this_week = db.query(
+        func.count(DiseaseDetection.id),
+        _count_if(DiseaseDetection.created_at >= week_ago)
+    ).filter(DiseaseDetection.user_id == farmer_id).one()
+
+    return FarmerSummary(
+        orders=order_counts(db, Order.farmer_id == farmer_id),
+        total_scans=total_scans,
+        scans_this_week=scans_this_week
+    )
+
+def agrovet_summary(db, agrovet_id):
+    month_start = datetime.utcnow().date().replace(day=1)
+    total_revenue, month_revenue, total_products = db.query(
+        func.coalesce(func.sum(DailySales.revenue), 0),
+        _sum_if(DailySales.day >= month_start, DailySales.revenue),
+        _count_of(Product, Product.agrovet_id == agrovet_id)
+    ).filter(DailySales.agrovet_id == agrovet_id).one()
+
+    return AgrovetSummary(
+        orders=order_counts(db, Order.agrovet_id == agrovet_id),
+        total_products=total_products,
+        total_revenue=float(total_revenue),
+        month_revenue=float(month_revenue)
+    )
+
+def admin_summary(db):
+    today = datetime.combine(datetime.utcnow().date(), time.min)
+
+    users = db.query(
+        User.role,
+        _count_if(User.is_active == True),
+        _count_if(User.created_at >= today)
+    ).group_by(User.role).all()
+
+    active_products, low_stock_products, total_posts, total_scans = db.query(
+        func.count(Product.id),
+        _count_if(Product.stock_quantity < LOW_STOCK_THRESHOLD),
+        _count_of(CommunityPost),
+        _count_of(DiseaseDetection)
+    ).filter(Product.is_active == True).one()
+
+    return AdminSummary(
+        orders=order_counts(db, since=today),
+        active_users_by_role={role: active for role, active, _ in users},
+        new_users_today=sum(new for _, _, new in users),
+        active_products=active_products,
+        low_stock_products=low_stock_products,
+        total_posts=total_posts,
+        total_scans=total_scans
+    )
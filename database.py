@@ -1,9 +1,12 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey, Boolean, Enum
+from contextlib import contextmanager
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Text, Float, Date, DateTime, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 import enum
+from query_stats import instrument_engine
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
@@ -11,8 +14,28 @@ if not DATABASE_URL:
     DATABASE_URL = "sqlite:///./adiseware.db"
     print("Warning: DATABASE_URL not found. Using SQLite fallback database.")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _engine_options(url):
+    """Connection pool settings for the configured database"""
+    options = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        return options
+    
+    # Every Streamlit rerun checks a connection out and returns it when the
+    # script finishes, so the pool only needs to cover concurrent reruns.
+    options.update(
+        poolclass=QueuePool,
+        pool_size=int(os.environ.get("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    )
+    return options
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+instrument_engine(engine)
+# Objects outlive the per-rerun session that loaded them (e.g. the logged-in
+# user kept in st.session_state), so keep their loaded state after commit.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 class UserRole(enum.Enum):
@@ -28,6 +51,10 @@ class OrderStatus(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role_active", "role", "is_active"),
+        Index("ix_users_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(100), unique=True, nullable=False, index=True)
@@ -45,9 +72,15 @@ class User(Base):
     agrovet_orders = relationship("Order", back_populates="agrovet", foreign_keys="Order.agrovet_id")
     community_posts = relationship("CommunityPost", back_populates="author")
     comments = relationship("Comment", back_populates="author")
+    products = relationship("Product", back_populates="agrovet")
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_agrovet_active_stock", "agrovet_id", "is_active", "stock_quantity"),
+        Index("ix_products_active_category", "is_active", "category"),
+        Index("ux_products_agrovet_barcode", "agrovet_id", "barcode", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -57,14 +90,22 @@ class Product(Base):
     stock_quantity = Column(Integer, default=0)
     image_url = Column(String(500))
     manufacturer = Column(String(255))
+    barcode = Column(String(64))
     agrovet_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
+    agrovet = relationship("User", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_agrovet_status_created", "agrovet_id", "status", "created_at"),
+        Index("ix_orders_farmer_status_created", "farmer_id", "status", "created_at"),
+        Index("ix_orders_status_created", "status", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     farmer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -82,6 +123,10 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_product_id", "product_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
@@ -89,12 +134,17 @@ class OrderItem(Base):
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
     subtotal = Column(Float, nullable=False)
+    category = Column(String(100))  # the product's category when it was sold
     
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
 
 class DiseaseDetection(Base):
     __tablename__ = "disease_detections"
+    __table_args__ = (
+        Index("ix_disease_detections_user_created", "user_id", "created_at"),
+        Index("ix_disease_detections_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -113,6 +163,10 @@ class DiseaseDetection(Base):
 
 class CommunityPost(Base):
     __tablename__ = "community_posts"
+    __table_args__ = (
+        Index("ix_community_posts_created_at", "created_at"),
+        Index("ix_community_posts_category_created", "category", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -125,10 +179,13 @@ class CommunityPost(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     author = relationship("User", back_populates="community_posts")
-    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
+    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", order_by="Comment.created_at")
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_created", "post_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("community_posts.id"), nullable=False)
@@ -141,6 +198,9 @@ class Comment(Base):
 
 class CustomerInteraction(Base):
     __tablename__ = "customer_interactions"
+    __table_args__ = (
+        Index("ix_customer_interactions_agrovet_created", "agrovet_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     agrovet_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -148,6 +208,31 @@ class CustomerInteraction(Base):
     interaction_type = Column(String(100))
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    agrovet = relationship("User", foreign_keys=[agrovet_id])
+    farmer = relationship("User", foreign_keys=[farmer_id])
+
+class DailySales(Base):
+    """Completed-sale totals per agrovet, day, category and product, maintained by sales_rollup"""
+    __tablename__ = "daily_sales"
+    
+    agrovet_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(String(100), primary_key=True, default="")
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    units_sold = Column(Integer, nullable=False, default=0)
+
+class DiagnosisCache(Base):
+    """AI diagnoses keyed by the perceptual hash of the analyzed image, maintained by diagnosis_cache"""
+    __tablename__ = "diagnosis_cache"
+    
+    id = Column(Integer, primary_key=True)
+    phash = Column(BigInteger, nullable=False, index=True)
+    result = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 def get_db():
     db = SessionLocal()
@@ -156,5 +241,21 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def session_scope():
+    """Open a session for one script rerun or unit of work
+    
+    The session is closed on exit, rolling back anything left uncommitted and
+    returning its connection to the pool.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def init_db():
+    from migrations import run_migrations
+    
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
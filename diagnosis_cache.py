@@ -0,0 +1,165 @@
+"""
+Perceptual-hash cache of AI disease diagnoses
+
+Farmers often resubmit the same photo, or another shot of the same leaf a
+moment later. Each preprocessed image gets a 64-bit perceptual hash (DCT
+pHash): visually similar images have hashes that differ in few bits, unlike
+a byte checksum. A stored diagnosis whose hash is within
+DIAGNOSIS_CACHE_DISTANCE bits of the new image is returned instead of making
+another paid vision call.
+
+Entries live in the diagnosis_cache table, shared by every app process.
+They expire after DIAGNOSIS_CACHE_TTL_DAYS, and beyond
+DIAGNOSIS_CACHE_MAX_ENTRIES the least recently used are evicted, which also
+bounds the near-duplicate scan (one query plus a vectorized XOR/popcount).
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import NamedTuple
+import numpy as np
+from PIL import Image
+from sqlalchemy import delete, func, select
+from database import DiagnosisCache, session_scope
+
+CACHE_DISTANCE = int(os.environ.get("DIAGNOSIS_CACHE_DISTANCE", "6"))
+CACHE_TTL_DAYS = int(os.environ.get("DIAGNOSIS_CACHE_TTL_DAYS", "30"))
+CACHE_MAX_ENTRIES = int(os.environ.get("DIAGNOSIS_CACHE_MAX_ENTRIES", "5000"))
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis; M @ x @ M.T is the 2-D DCT of an n x n block"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+_DCT = _dct_matrix(DCT_SIZE)
+
+def perceptual_hash(image_bytes):
+    """64-bit pHash: signs of the lowest 8x8 DCT frequencies of a 32x32 grayscale thumbnail vs their median"""
+    image = Image.open(BytesIO(image_bytes)).convert("L").resize((DCT_SIZE, DCT_SIZE), Image.Resampling.LANCZOS)
+    pixels = np.asarray(image, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def _signed(value):
+    """Store an unsigned 64-bit hash in a signed BIGINT column"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def hamming_distances(stored, target):
+    """Bits differing between each signed stored hash and an unsigned target hash"""
+    hashes = np.asarray(stored, dtype=np.int64).view(np.uint64)
+    return np.bitwise_count(hashes ^ np.uint64(target))
+
+class CacheStats(NamedTuple):
+    """Lookups served by this process, and the cache table's size and lifetime hits"""
+    lookups: int
+    exact_hits: int
+    near_hits: int
+    entries: int
+    stored_hits: int
+
+    @property
+    def hits(self):
+        return self.exact_hits + self.near_hits
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+_counters = {"lookups": 0, "exact_hits": 0, "near_hits": 0}
+_counters_lock = threading.Lock()
+
+def _count(*names):
+    with _counters_lock:
+        for name in names:
+            _counters[name] += 1
+
+def _oldest_allowed():
+    return datetime.utcnow() - timedelta(days=CACHE_TTL_DAYS)
+
+def lookup(phash, max_distance=CACHE_DISTANCE):
+    """(stored result, distance in bits) of the closest live entry within max_distance, or None"""
+    with session_scope() as db:
+        live = DiagnosisCache.created_at >= _oldest_allowed()
+        entry = db.query(DiagnosisCache).filter(DiagnosisCache.phash == _signed(phash), live).first()
+        distance = 0
+
+        if entry is None and max_distance > 0:
+            candidates = db.query(DiagnosisCache.id, DiagnosisCache.phash).filter(live).all()
+            if candidates:
+                distances = hamming_distances([c.phash for c in candidates], phash)
+                best = int(np.argmin(distances))
+                if distances[best] <= max_distance:
+                    entry = db.get(DiagnosisCache, candidates[best].id)
+                    distance = int(distances[best])
+
+        if entry is None:
+            return None
+
+        entry.hits += 1
+        entry.last_used_at = datetime.utcnow()
+        db.commit()
+        return json.loads(entry.result), distance
+
+def store(phash, result):
+    """Save a diagnosis, then drop expired and least recently used entries beyond the limit"""
+    with session_scope() as db:
+        now = datetime.utcnow()
+        db.add(DiagnosisCache(phash=_signed(phash), result=json.dumps(result), created_at=now, last_used_at=now))
+        db.flush()
+
+        db.execute(delete(DiagnosisCache).where(DiagnosisCache.created_at < _oldest_allowed()))
+        surplus = select(DiagnosisCache.id).order_by(
+            DiagnosisCache.last_used_at.desc(), DiagnosisCache.id.desc()
+        ).offset(CACHE_MAX_ENTRIES).scalar_subquery()
+        db.execute(delete(DiagnosisCache).where(DiagnosisCache.id.in_(surplus)))
+        db.commit()
+
+def confidence(result):
+    """The model's confidence as a float; it may come back as a string, null or junk"""
+    try:
+        return float(result.get("confidence") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def is_cacheable(result):
+    """Errors and placeholder results must not be served to later uploads"""
+    return "error" not in result and confidence(result) > 0
+
+def diagnose(image_bytes, analyze):
+    """
+    Diagnosis of a preprocessed image, from the cache when a near-identical
+    image was analyzed before, otherwise from analyze(image_bytes)
+
+    Returns (result, distance): distance is the Hamming distance of the
+    matched cache entry, or None when analyze was called.
+    """
+    phash = perceptual_hash(image_bytes)
+    cached = lookup(phash)
+    if cached is not None:
+        result, distance = cached
+        _count("lookups", "exact_hits" if distance == 0 else "near_hits")
+        return result, distance
+
+    _count("lookups")
+    result = analyze(image_bytes)
+    if is_cacheable(result):
+        store(phash, result)
+    return result, None
+
+def cache_stats():
+    with session_scope() as db:
+        entries, stored_hits = db.query(
+            func.count(DiagnosisCache.id),
+            func.coalesce(func.sum(DiagnosisCache.hits), 0)
+        ).one()
+    with _counters_lock:
+        return CacheStats(entries=entries, stored_hits=stored_hits, **_counters)
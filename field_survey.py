@@ -0,0 +1,179 @@
+"""
+Concurrent analysis of a field survey's photos
+
+An extension officer's field walk produces 50-200 leaf photos. Each photo is
+preprocessed, checked against the diagnosis cache and, on a miss, sent to
+the vision model by a bounded pool of SURVEY_WORKERS threads, so a survey
+takes roughly len(photos) / SURVEY_WORKERS sequential calls. Calls start no
+faster than AI_RATE_LIMIT per second across every survey in the process,
+and each gets SURVEY_TIMEOUT seconds.
+
+analyze_survey() yields results as they finish, for the page to render on
+the script thread (Streamlit calls must not come from worker threads);
+save_survey() then inserts all the DiseaseDetection rows in one statement.
+Photos with identical bytes are analyzed once and share the result.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import partial
+from typing import NamedTuple, Optional
+from sqlalchemy import insert
+from ai_helper import analyze_plant_disease
+from blob_store import put
+from database import DiseaseDetection
+from diagnosis_cache import confidence, diagnose
+from image_processing import prepare_image
+
+SURVEY_WORKERS = int(os.environ.get("SURVEY_WORKERS", "10"))
+SURVEY_TIMEOUT = float(os.environ.get("SURVEY_TIMEOUT", "90"))
+AI_RATE_LIMIT = float(os.environ.get("AI_RATE_LIMIT", "5"))
+MAX_SURVEY_IMAGES = 200
+
+# Preprocessing, the cache lookup and waiting for the rate limiter come on
+# top of the request timeout before a photo is given up on
+TIMEOUT_GRACE = 15
+
+class RateLimiter:
+    """Token bucket shared between threads: acquire() blocks until a call may start"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+# The provider's rate limit is per API key, so every survey shares one bucket
+_limiter = RateLimiter(AI_RATE_LIMIT)
+
+class SurveyResult(NamedTuple):
+    """Outcome for one photo: a diagnosis, or the reason there is none"""
+    name: str
+    result: Optional[dict]
+    error: Optional[str]
+    cached: bool = False
+    image_ref: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return self.result is not None
+
+def _failed(name, error, started):
+    return SurveyResult(name, None, error, seconds=time.monotonic() - started)
+
+def _analyze_one(key, data, analyze, limiter, started):
+    """Runs on a worker thread; key is (position, filename)"""
+    name = key[1]
+    started[key] = begin = time.monotonic()
+    try:
+        prepared = prepare_image(data)
+    except ValueError as e:
+        return _failed(name, str(e), begin)
+
+    def limited(image_bytes):
+        limiter.acquire()
+        return analyze(image_bytes)
+
+    result, distance = diagnose(prepared.data, limited)
+    if "error" in result and confidence(result) == 0:
+        return _failed(name, result.get("symptoms") or result["error"], begin)
+
+    try:
+        image_ref = put(prepared.data)
+    except OSError as e:
+        # The diagnosis is already paid for; keep it without the photo
+        print(f"Warning: could not store survey photo {name}: {e}")
+        image_ref = None
+    return SurveyResult(name, result, None, distance is not None, image_ref, time.monotonic() - begin)
+
+def analyze_survey(files, workers=SURVEY_WORKERS, timeout=SURVEY_TIMEOUT, analyze=None, limiter=None):
+    """
+    Analyze (filename, image bytes) pairs concurrently, yielding a
+    SurveyResult for each as soon as it finishes
+
+    `analyze(image_bytes)` defaults to analyze_plant_disease with the timeout.
+    A photo still running TIMEOUT_GRACE seconds past the timeout is reported
+    as timed out. Closing the generator early cancels photos not yet started.
+    """
+    analyze = analyze or partial(analyze_plant_disease, timeout=timeout)
+    limiter = limiter or _limiter
+    started = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="survey")
+    try:
+        # future -> keys of every photo with those exact bytes; the first is analyzed
+        pending = {}
+        by_content = {}
+        for index, (name, data) in enumerate(files):
+            key = (index, name)
+            digest = hashlib.sha256(data).digest()
+            if digest in by_content:
+                pending[by_content[digest]].append(key)
+                continue
+            future = executor.submit(_analyze_one, key, data, analyze, limiter, started)
+            by_content[digest] = future
+            pending[future] = [key]
+
+        while pending:
+            done, _ = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                first, *copies = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = _failed(first[1], f"Analysis failed: {e}", started.get(first, time.monotonic()))
+                yield result
+                for key in copies:
+                    yield result._replace(name=key[1], cached=result.cached or result.ok)
+
+            now = time.monotonic()
+            for future, (first, *copies) in list(pending.items()):
+                if first in started and now - started[first] > timeout + TIMEOUT_GRACE:
+                    del pending[future]
+                    for key in (first, *copies):
+                        yield _failed(key[1], f"Timed out after {timeout:.0f}s", started[first])
+    finally:
+        # Timed-out calls finish in the background; queued photos never start
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def save_survey(db, user_id, results):
+    """
+    Insert a DiseaseDetection for every successful result in one statement;
+    returns how many. The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "image_path": r.image_ref,
+            "plant_type": r.result.get("plant_type", "Unknown"),
+            "disease_name": r.result.get("disease_name", "Unknown"),
+            "confidence_score": confidence(r.result),
+            "severity": r.result.get("severity", "Unknown"),
+            "symptoms": r.result.get("symptoms", ""),
+            "causes": r.result.get("causes", ""),
+            "treatment": r.result.get("treatment", ""),
+            "prevention": r.result.get("prevention", ""),
+            "created_at": now,
+        }
+        for r in results if r.ok
+    ]
+    if rows:
+        db.execute(insert(DiseaseDetection), rows)
+    return len(rows)
@@ -0,0 +1,369 @@
+"""
+Synthetic data generator for load testing
+
+Fills the database with farmers, agrovets, products, orders and order lines,
+disease detections, community posts with comments and CRM interactions at a
+configurable scale. Orders follow the planting seasons, weekdays and shop
+hours, customers and products have long-tailed popularity, and recent orders
+are still pending or processing, so queries see realistic skew.
+
+Rows are generated column-wise with numpy and written with the fastest bulk
+path of the database: COPY on Postgres and batched executemany on SQLite.
+Ids are assigned here (continuing after the existing rows) so foreign keys
+can be built without reading anything back. The daily_sales rollup is
+rebuilt at the end.
+
+Usage:
+    python generate_data.py --size medium
+    python generate_data.py --farmers 50000 --agrovets 500 --orders 4000000
+"""
+import argparse
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func, select, text
+from database import (engine, init_db, User, Product, Order, OrderItem, DiseaseDetection,
+                      CommunityPost, Comment, CustomerInteraction)
+from auth import hash_password
+import sales_rollup
+
+SIZES = {
+    "small": dict(farmers=200, agrovets=10, products_per_agrovet=40, orders=5_000,
+                  detections=500, posts=200, comments_per_post=3),
+    "medium": dict(farmers=5_000, agrovets=100, products_per_agrovet=60, orders=200_000,
+                   detections=20_000, posts=5_000, comments_per_post=4),
+    "large": dict(farmers=50_000, agrovets=500, products_per_agrovet=80, orders=4_000_000,
+                  detections=200_000, posts=50_000, comments_per_post=5),
+}
+
+PASSWORD = "demo123"
+ORDER_CHUNK = 250_000
+SQLITE_BATCH = 50_000
+
+LOCATIONS = ["Nairobi, Kenya", "Nakuru, Kenya", "Eldoret, Kenya", "Kisumu, Kenya", "Meru, Kenya",
+             "Nyeri, Kenya", "Machakos, Kenya", "Kitale, Kenya", "Embu, Kenya", "Kericho, Kenya"]
+
+PRODUCT_CATALOG = {
+    "Fertilizers": (["NPK 17:17:17", "DAP", "CAN", "Urea", "Organic Compost", "Foliar Feed"], 30.0),
+    "Pesticides": (["Insecticide Spray", "Aphid Control", "Armyworm Killer", "Mite Control"], 18.0),
+    "Seeds": (["Hybrid Maize", "Tomato", "Kale", "Bean", "Onion", "Cabbage", "Sorghum"], 9.0),
+    "Tools": (["Jembe", "Garden Hoe", "Knapsack Sprayer", "Pruning Shears", "Wheelbarrow"], 25.0),
+    "Medications": (["Fungicide", "Copper Oxychloride", "Dewormer", "Poultry Vaccine"], 20.0),
+}
+MANUFACTURERS = ["GreenGrow", "CropCare", "SeedMaster", "PlantHealth", "FarmTools Inc", "AgroLink"]
+
+DISEASES = [
+    ("Tomato", "Late Blight"), ("Tomato", "Early Blight"), ("Maize", "Maize Lethal Necrosis"),
+    ("Maize", "Grey Leaf Spot"), ("Bean", "Bean Rust"), ("Potato", "Bacterial Wilt"),
+    ("Kale", "Black Rot"), ("Coffee", "Coffee Berry Disease"), ("Banana", "Panama Disease"),
+    ("Tomato", "Healthy"),
+]
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+
+POST_CATEGORIES = ["Question", "Experience", "Tips", "Market Info", "Success Story"]
+INTERACTION_TYPES = ["Phone Call", "Email", "In-Person Visit", "Follow-up", "Complaint", "Feedback"]
+PAYMENT_METHODS = ["Cash", "Mobile Money", "Card", "Credit"]
+
+def next_ids(conn, model, count):
+    """Ids for `count` new rows of model, continuing after the current maximum"""
+    start = (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+    return np.arange(start, start + count, dtype=np.int64)
+
+def timestamps(rng, count, start, days, growth=True):
+    """Datetimes with seasonal, weekday and time-of-day patterns between start and start + days"""
+    day_numbers = np.arange(days)
+    day_dates = np.datetime64(start.date()) + day_numbers
+    doy = (day_dates - day_dates.astype("datetime64[Y]")).astype(int)
+    weekday = (day_dates.astype("datetime64[D]").view("int64") - 4) % 7
+
+    # Long rains (March/April) and short rains (October) planting peaks
+    weights = 1.0 + 0.8 * np.exp(-((doy - 80) / 25.0) ** 2) + 0.5 * np.exp(-((doy - 290) / 25.0) ** 2)
+    weights *= np.array([1.0, 1.0, 1.0, 1.05, 1.15, 1.3, 0.5])[weekday]
+    if growth:
+        weights *= np.linspace(0.3, 1.0, days)
+    day_index = rng.choice(days, size=count, p=weights / weights.sum())
+
+    hour_weights = np.array([0, 0, 0, 0, 0, 1, 3, 6, 9, 10, 10, 9, 7, 7, 8, 9, 9, 8, 6, 4, 2, 1, 0, 0], dtype=float)
+    hours = rng.choice(24, size=count, p=hour_weights / hour_weights.sum())
+    micros = rng.integers(0, 3_600_000_000, size=count)
+
+    base = np.datetime64(start.replace(hour=0, minute=0, second=0, microsecond=0), "us")
+    return np.sort(base + day_index.astype("timedelta64[D]") + hours.astype("timedelta64[h]") + micros.astype("timedelta64[us]"))
+
+def datetime_strings(values):
+    """'YYYY-MM-DD HH:MM:SS.ffffff' strings accepted by both SQLite and Postgres"""
+    return np.char.replace(np.datetime_as_string(values, unit="us"), "T", " ")
+
+def popularity(rng, count, shape=1.2):
+    """Long-tailed selection probabilities (a few customers/shops do most of the business)"""
+    weights = rng.pareto(shape, count) + 1.0
+    return weights / weights.sum()
+
+def write_rows(conn, table, columns):
+    """Bulk insert a dict of equal-length column arrays into table"""
+    names = list(columns)
+    values = [np.asarray(columns[name]).tolist() for name in names]
+    if not values or not values[0]:
+        return
+
+    raw = conn.connection.driver_connection
+    cursor = raw.cursor()
+    try:
+        if conn.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows(zip(*values))
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+            rows = list(zip(*values))
+            for i in range(0, len(rows), SQLITE_BATCH):
+                cursor.executemany(sql, rows[i:i + SQLITE_BATCH])
+    finally:
+        cursor.close()
+
+def generate_users(conn, rng, role, count, start, days, password_hash):
+    """Insert users of one role; returns their ids"""
+    ids = next_ids(conn, User, count)
+    prefix = role.lower()
+    created = timestamps(rng, count, start, days)
+    names = [f"{'Farmer' if role == 'FARMER' else 'Agro Shop'} {i}" for i in ids]
+
+    write_rows(conn, "users", {
+        "id": ids,
+        "username": [f"{prefix}_{i}" for i in ids],
+        "email": [f"{prefix}_{i}@example.com" for i in ids],
+        "password_hash": np.full(count, password_hash, dtype=object),
+        "full_name": names,
+        "phone": [f"+2547{i % 100_000_000:08d}" for i in ids],
+        "role": np.full(count, role, dtype=object),
+        "location": rng.choice(LOCATIONS, size=count),
+        "created_at": datetime_strings(created),
+        "is_active": rng.random(count) > 0.03,
+    })
+    return ids
+
+def generate_products(conn, rng, agrovet_ids, per_agrovet, start):
+    """Insert per_agrovet products for every agrovet; ids are contiguous per agrovet"""
+    count = len(agrovet_ids) * per_agrovet
+    ids = next_ids(conn, Product, count)
+    categories = rng.choice(list(PRODUCT_CATALOG), size=count)
+    base_prices = np.array([PRODUCT_CATALOG[c][1] for c in categories])
+    prices = np.round(base_prices * rng.lognormal(0, 0.5, count), 2).clip(0.5)
+    names = [f"{rng.choice(PRODUCT_CATALOG[c][0])} {rng.choice(['1kg', '2kg', '5kg', '50kg', '500ml', '1L', 'Pack'])}"
+             for c in categories]
+    owners = np.repeat(agrovet_ids, per_agrovet)
+
+    write_rows(conn, "products", {
+        "id": ids,
+        "name": names,
+        "description": [f"{name} for smallholder and commercial farms" for name in names],
+        "category": categories,
+        "price": prices,
+        "stock_quantity": rng.integers(0, 500, count),
+        "manufacturer": rng.choice(MANUFACTURERS, size=count),
+        "barcode": [f"{owner:06d}{i:07d}" for owner, i in zip(owners, ids)],
+        "agrovet_id": owners,
+        "created_at": datetime_strings(np.full(count, np.datetime64(start, "us"))),
+        "is_active": rng.random(count) > 0.05,
+    })
+    return ids, prices, categories
+
+def generate_orders(conn, rng, count, farmer_ids, agrovet_ids, product_ids, prices, categories, per_agrovet, start, days, now):
+    """Insert count orders with their lines in chunks; returns the number of lines"""
+    farmer_p = popularity(rng, len(farmer_ids))
+    agrovet_p = popularity(rng, len(agrovet_ids), shape=2.0)
+    rank_weights = 1.0 / np.arange(1, per_agrovet + 1) ** 0.9
+    rank_p = rank_weights / rank_weights.sum()
+    # Timestamps for the whole run first so ids increase with time across chunks
+    created_all = timestamps(rng, count, start, days)
+    total_lines = 0
+
+    for offset in range(0, count, ORDER_CHUNK):
+        created = created_all[offset:offset + ORDER_CHUNK]
+        n = len(created)
+        order_ids = next_ids(conn, Order, n)
+        agrovet_index = rng.choice(len(agrovet_ids), size=n, p=agrovet_p)
+
+        lines_per_order = 1 + rng.poisson(1.5, n).clip(0, 11)
+        wholesale = rng.random(n) < 0.02
+        lines_per_order[wholesale] += rng.integers(10, 40, wholesale.sum())
+        line_order = np.repeat(np.arange(n), lines_per_order)
+        line_count = len(line_order)
+
+        product_index = agrovet_index[line_order] * per_agrovet + rng.choice(per_agrovet, size=line_count, p=rank_p)
+        quantity = rng.geometric(0.45, line_count)
+        quantity[wholesale[line_order]] *= 5
+        unit_price = prices[product_index]
+        subtotal = np.round(quantity * unit_price, 2)
+        totals = np.round(np.bincount(line_order, weights=subtotal, minlength=n), 2)
+
+        age_days = (np.datetime64(now, "us") - created).astype("timedelta64[D]").astype(int)
+        settled = rng.choice(["COMPLETED", "CANCELLED", "PENDING", "PROCESSING"], size=n, p=[0.88, 0.08, 0.02, 0.02])
+        recent = rng.choice(["PENDING", "PROCESSING", "COMPLETED", "CANCELLED"], size=n, p=[0.45, 0.3, 0.2, 0.05])
+        status = np.where(age_days < 3, recent, settled)
+
+        in_store = rng.random(n) < 0.55
+        payments = rng.choice(PAYMENT_METHODS, size=n, p=[0.45, 0.4, 0.1, 0.05])
+        created_text = datetime_strings(created)
+
+        write_rows(conn, "orders", {
+            "id": order_ids,
+            "farmer_id": farmer_ids[rng.choice(len(farmer_ids), size=n, p=farmer_p)],
+            "agrovet_id": agrovet_ids[agrovet_index],
+            "total_amount": totals,
+            "status": status,
+            "delivery_address": np.where(in_store, "In-store purchase", rng.choice(LOCATIONS, size=n)),
+            "notes": np.char.add(np.char.add("Payment: ", payments), ". "),
+            "created_at": created_text,
+            "updated_at": created_text,
+        })
+        write_rows(conn, "order_items", {
+            "id": next_ids(conn, OrderItem, line_count),
+            "order_id": order_ids[line_order],
+            "product_id": product_ids[product_index],
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "subtotal": subtotal,
+            "category": categories[product_index],
+        })
+        total_lines += line_count
+        print(f"  orders {offset + n:,}/{count:,} ({total_lines:,} lines)")
+
+    return total_lines
+
+def generate_detections(conn, rng, count, farmer_ids, start, days):
+    """Insert disease detection history for farmers"""
+    picks = rng.integers(0, len(DISEASES), count)
+    write_rows(conn, "disease_detections", {
+        "id": next_ids(conn, DiseaseDetection, count),
+        "user_id": rng.choice(farmer_ids, size=count),
+        "plant_type": [DISEASES[i][0] for i in picks],
+        "disease_name": [DISEASES[i][1] for i in picks],
+        "confidence_score": np.round(rng.uniform(0.55, 0.99, count), 2),
+        "severity": rng.choice(SEVERITIES, size=count, p=[0.35, 0.35, 0.2, 0.1]),
+        "symptoms": np.full(count, "Spots and discoloration on leaves", dtype=object),
+        "causes": np.full(count, "Fungal or bacterial infection favoured by wet weather", dtype=object),
+        "treatment": np.full(count, "Remove affected leaves and apply a suitable fungicide", dtype=object),
+        "prevention": np.full(count, "Rotate crops and avoid overhead irrigation", dtype=object),
+        "created_at": datetime_strings(timestamps(rng, count, start, days)),
+    })
+
+def generate_community(conn, rng, count, comments_per_post, farmer_ids, agrovet_ids, start, days, now):
+    """Insert community posts and their comments; returns the number of comments"""
+    authors = np.concatenate([farmer_ids, agrovet_ids])
+    author_p = np.where(np.arange(len(authors)) < len(farmer_ids), 1.0, 3.0)
+    author_p /= author_p.sum()
+
+    post_ids = next_ids(conn, CommunityPost, count)
+    posted = timestamps(rng, count, start, days)
+    categories = rng.choice(POST_CATEGORIES, size=count)
+    posted_text = datetime_strings(posted)
+    write_rows(conn, "community_posts", {
+        "id": post_ids,
+        "author_id": rng.choice(authors, size=count, p=author_p),
+        "title": [f"{c}: notes from the field #{i}" for c, i in zip(categories, post_ids)],
+        "content": np.full(count, "Sharing what worked on our farm this season.", dtype=object),
+        "category": categories,
+        "likes_count": rng.geometric(0.2, count) - 1,
+        "created_at": posted_text,
+        "updated_at": posted_text,
+    })
+
+    per_post = rng.poisson(comments_per_post, count)
+    comment_post = np.repeat(np.arange(count), per_post)
+    comment_count = len(comment_post)
+    delay = rng.exponential(12, comment_count).astype("timedelta64[h]")
+    commented = np.minimum(posted[comment_post] + delay, np.datetime64(now, "us"))
+    write_rows(conn, "comments", {
+        "id": next_ids(conn, Comment, comment_count),
+        "post_id": post_ids[comment_post],
+        "author_id": rng.choice(authors, size=comment_count, p=author_p),
+        "content": np.full(comment_count, "Thanks, this is helpful.", dtype=object),
+        "created_at": datetime_strings(commented),
+    })
+    return comment_count
+
+def generate_interactions(conn, rng, count, farmer_ids, agrovet_ids, start, days):
+    """Insert CRM interactions between agrovets and farmers"""
+    write_rows(conn, "customer_interactions", {
+        "id": next_ids(conn, CustomerInteraction, count),
+        "agrovet_id": rng.choice(agrovet_ids, size=count),
+        "farmer_id": rng.choice(farmer_ids, size=count),
+        "interaction_type": rng.choice(INTERACTION_TYPES, size=count),
+        "notes": np.full(count, "Discussed product needs for the coming season", dtype=object),
+        "created_at": datetime_strings(timestamps(rng, count, start, days)),
+    })
+
+def reset_sequences(conn):
+    """Move Postgres id sequences past the explicitly inserted ids"""
+    for table in ["users", "products", "orders", "order_items", "disease_detections",
+                  "community_posts", "comments", "customer_interactions"]:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+
+def generate(farmers, agrovets, products_per_agrovet, orders, detections, posts, comments_per_post,
+             days=730, seed=42, bind=engine):
+    """Generate a full synthetic dataset into bind"""
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    password_hash = hash_password(PASSWORD)
+    started = time.perf_counter()
+
+    def step(message):
+        print(f"✅ {message} ({time.perf_counter() - started:.1f}s)")
+
+    with bind.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        farmer_ids = generate_users(conn, rng, "FARMER", farmers, start, days, password_hash)
+        agrovet_ids = generate_users(conn, rng, "AGROVET", agrovets, start, days, password_hash)
+        product_ids, prices, categories = generate_products(conn, rng, agrovet_ids, products_per_agrovet, start)
+    step(f"{farmers:,} farmers, {agrovets:,} agrovets, {len(product_ids):,} products")
+
+    with bind.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        lines = generate_orders(conn, rng, orders, farmer_ids, agrovet_ids, product_ids, prices,
+                                categories, products_per_agrovet, start, days, now)
+    step(f"{orders:,} orders with {lines:,} lines")
+
+    with bind.begin() as conn:
+        generate_detections(conn, rng, detections, farmer_ids, start, days)
+        comments = generate_community(conn, rng, posts, comments_per_post, farmer_ids, agrovet_ids, start, days, now)
+        generate_interactions(conn, rng, max(orders // 20, 1), farmer_ids, agrovet_ids, start, days)
+    step(f"{detections:,} detections, {posts:,} posts, {comments:,} comments")
+
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            reset_sequences(conn)
+        sales_rollup.backfill(conn)
+    step("daily_sales rollup rebuilt")
+
+    with bind.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    step(f"Done. All generated accounts use the password '{PASSWORD}'")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Adiseware data for load testing")
+    parser.add_argument("--size", choices=list(SIZES), default="small", help="preset to start from")
+    for name in SIZES["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name, help="override the preset")
+    parser.add_argument("--days", type=int, default=730, help="history length in days")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = dict(SIZES[args.size])
+    counts.update({name: getattr(args, name) for name in counts if getattr(args, name) is not None})
+
+    init_db()
+    generate(days=args.days, seed=args.seed, **counts)
+
+if __name__ == "__main__":
+    main()
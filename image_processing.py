@@ -0,0 +1,79 @@
+"""
+Image preprocessing before AI analysis
+
+Phone photos are 3-12 MP JPEGs (or PNGs with transparency) carrying EXIF
+orientation and metadata. prepare_image() turns them into an upright,
+metadata-free RGB JPEG no larger than IMAGE_MAX_EDGE pixels on its longest
+side, which is all the vision model needs and a fraction of the bytes to
+upload and to pay for in image tokens.
+"""
+import os
+from io import BytesIO
+from typing import NamedTuple
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+MAX_EDGE = int(os.environ.get("IMAGE_MAX_EDGE", "1024"))
+JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "80"))
+BACKGROUND = (255, 255, 255)
+
+# Refuse decompression bombs well before they exhaust memory
+Image.MAX_IMAGE_PIXELS = 50_000_000
+
+class PreparedImage(NamedTuple):
+    """JPEG bytes ready for analysis, with the size before and after"""
+    data: bytes
+    width: int
+    height: int
+    original_bytes: int
+
+    @property
+    def processed_bytes(self):
+        return len(self.data)
+
+    @property
+    def reduction(self):
+        """How many times smaller the prepared image is than the upload"""
+        return self.original_bytes / self.processed_bytes if self.processed_bytes else 0
+
+def _to_rgb(image):
+    """Flatten transparency onto a white background; JPEG has no alpha channel"""
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    if image.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", image.size, BACKGROUND)
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+def prepare_image(source, max_edge=MAX_EDGE, quality=JPEG_QUALITY):
+    """
+    Upright, downscaled, metadata-free JPEG of an uploaded image
+
+    `source` is the raw bytes of a JPEG, PNG or other PIL-readable image.
+    Raises ValueError if it cannot be decoded.
+    """
+    try:
+        image = Image.open(BytesIO(source))
+        # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding
+        image.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        image = _to_rgb(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(f"Could not read image: {e}") from e
+
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    # Saving without exif=/icc_profile= drops EXIF (GPS, device) and other metadata
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return PreparedImage(output.getvalue(), image.width, image.height, len(source))
+
+def format_size(num_bytes):
+    """Human-readable byte count, e.g. '4.8 MB'"""
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    if num_bytes < 1024 * 1024:
+        return f"{num_bytes / 1024:.1f} KB"
+    return f"{num_bytes / (1024 * 1024):.1f} MB"
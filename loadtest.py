@@ -0,0 +1,269 @@
+"""
+Concurrent-session load test
+
+Drives app.py through Streamlit's AppTest with many simultaneous scripted
+sessions against one database. AppTest keeps process-wide runtime state, so
+each virtual user runs in its own worker process; all of them start together
+and contend for the database and the CPUs like concurrent reruns of a
+deployed app. Farmers log in, browse the marketplace, add to cart, check out,
+view their orders and ask the AI assistant; agrovets log in, ring up a POS
+sale and view orders, analytics and their dashboard. Every rerun is timed,
+and for each concurrency level the p50/p95/p99 rerun latency, throughput and
+error rate are reported.
+
+The AI functions in ai_helper are replaced with canned answers, so the test
+runs fully offline. Stored images and the slow-query log go to a temporary
+directory unless BLOB_STORE_DIR / SLOW_QUERY_LOG are set. Accounts are taken from the configured database and must
+share one password (generate_data.py and seed_data.py both use demo123).
+
+Usage:
+    DATABASE_URL=sqlite:///bench_data/medium.db python loadtest.py --levels 1 4 8 16
+"""
+import os
+import tempfile
+
+os.environ["OPENAI_API_KEY"] = ""
+
+# Keep the run's artifacts out of the working tree. Worker processes inherit
+# these from the parent, so only the parent creates a directory.
+if not {"BLOB_STORE_DIR", "SLOW_QUERY_LOG"} <= os.environ.keys():
+    _scratch = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ.setdefault("BLOB_STORE_DIR", os.path.join(_scratch, "blob_store"))
+    os.environ.setdefault("SLOW_QUERY_LOG", os.path.join(_scratch, "slow_queries.log"))
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import ai_helper
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PAGE_TIMEOUT = 120
+
+def stub_ai():
+    """Replace the OpenAI-backed helpers with instant canned responses"""
+    ai_helper.get_agricultural_advice = lambda question, context="": (
+        "Use certified seed, test your soil before planting and irrigate early in the morning."
+    )
+    ai_helper.analyze_plant_disease = lambda image_bytes, timeout=None: {
+        "plant_type": "Tomato",
+        "disease_name": "Early Blight",
+        "confidence": 0.9,
+        "severity": "Medium",
+        "symptoms": "Brown concentric spots on older leaves",
+        "causes": "Alternaria solani",
+        "treatment": "Remove affected leaves and apply a copper fungicide",
+        "prevention": "Rotate crops and avoid wetting the foliage",
+        "recommended_products": [],
+    }
+
+class StepFailed(Exception):
+    pass
+
+class Session:
+    """One simulated browser session; every action is a timed rerun"""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.at = self.new_app()
+
+    @staticmethod
+    def new_app():
+        from streamlit.testing.v1 import AppTest
+
+        return AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=PAGE_TIMEOUT)
+
+    def step(self, name, action=None):
+        """Apply action (a widget interaction) and time the resulting rerun"""
+        started = time.perf_counter()
+        try:
+            if action is not None:
+                action(self.at)
+            self.at.run()
+        except Exception as e:
+            self.recorder.record(name, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+            raise StepFailed(name) from e
+
+        error = self.at.exception[0].value if self.at.exception else None
+        self.recorder.record(name, time.perf_counter() - started, error)
+        if error:
+            raise StepFailed(name)
+
+    def button(self, label=None, key=None):
+        """Return a click action for the first button matching label or key"""
+        def click(at):
+            for button in at.button:
+                if (key and button.key == key) or (label and button.label and button.label.startswith(label)):
+                    button.click()
+                    return
+            raise StepFailed(f"button {key or label!r} not found")
+        return click
+
+    def navigate(self, key):
+        self.step(f"nav:{key}", self.button(key=key))
+
+    def login(self, username, password):
+        self.step("home")
+        self.navigate("nav_login")
+
+        def fill(at):
+            at.text_input[0].input(username)
+            at.text_input[1].input(password)
+            self.button(label="Login")(at)
+        self.step("login", fill)
+
+        # AppTest keeps the login form's widgets from before the st.rerun()
+        # in its element tree; continue like a browser showing the new page.
+        logged_in = self.new_app()
+        for key in ("user", "page"):
+            logged_in.session_state[key] = self.at.session_state[key]
+        self.at = logged_in
+        self.step("landing")
+
+def farmer_journey(session, username, password):
+    session.login(username, password)
+    session.navigate("nav_marketplace")
+    session.step("add_to_cart", session.button(label="🛒 Add"))
+
+    def checkout(at):
+        [area for area in at.text_area if area.label == "Delivery Address"][0].input("Plot 12, Farm Road")
+        session.button(label="✅ Place Order")(at)
+    session.step("checkout", checkout)
+
+    session.navigate("nav_orders")
+    session.navigate("nav_ai")
+    session.step("ask_ai", session.button(label="💧 Irrigation tips?"))
+    session.navigate("nav_dashboard")
+
+def agrovet_journey(session, username, password, search_term):
+    session.login(username, password)
+    session.navigate("nav_pos")
+    session.step("pos_search", lambda at: at.text_input(key="pos_search").input(search_term))
+    session.step("pos_add", session.button(label="➕"))
+
+    def sell(at):
+        customer = [box for box in at.selectbox if box.label == "Select Customer"][0]
+        if len(customer.options) > 1:
+            customer.select(customer.options[1])
+        session.button(label="✅ Complete Sale")(at)
+    session.step("pos_sale", sell)
+
+    session.navigate("nav_agrovet_orders")
+    session.navigate("nav_analytics")
+    session.navigate("nav_agrovet_dashboard")
+
+class Recorder:
+    """Collection of (step, seconds, error) samples of one virtual user"""
+
+    def __init__(self):
+        self.samples = []
+
+    def record(self, step, seconds, error):
+        self.samples.append((step, seconds, error))
+
+def load_accounts(count):
+    """Farmer usernames, and agrovet usernames with a search term that matches their stock"""
+    from database import SessionLocal, User, UserRole, Product
+
+    db = SessionLocal()
+    try:
+        farmers = [u.username for u in db.query(User).filter(
+            User.role == UserRole.FARMER, User.is_active == True
+        ).limit(count)]
+        agrovets = []
+        for agrovet in db.query(User).filter(User.role == UserRole.AGROVET, User.is_active == True).limit(count * 4):
+            product = db.query(Product).filter(
+                Product.agrovet_id == agrovet.id,
+                Product.is_active == True,
+                Product.stock_quantity > 10
+            ).first()
+            if product:
+                agrovets.append((agrovet.username, product.name.split()[0]))
+            if len(agrovets) == count:
+                break
+        return farmers, agrovets
+    finally:
+        db.close()
+
+def virtual_user(index, iterations, farmers, agrovets, password, barrier):
+    """Run one user's journeys in a worker process; returns (samples, failed steps, start, end)"""
+    stub_ai()
+    rng = random.Random(index)
+    recorder = Recorder()
+    failures = []
+
+    barrier.wait()
+    started = time.time()
+    for _ in range(iterations):
+        session = Session(recorder)
+        try:
+            if index % 2 == 0:
+                farmer_journey(session, rng.choice(farmers), password)
+            else:
+                username, term = rng.choice(agrovets)
+                agrovet_journey(session, username, password, term)
+        except StepFailed as e:
+            failures.append(str(e))
+    return recorder.samples, failures, started, time.time()
+
+def run_level(concurrency, iterations, farmers, agrovets, password):
+    """Run `concurrency` virtual users at once, each repeating its journey `iterations` times"""
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, ProcessPoolExecutor(concurrency, mp_context=context) as pool:
+        barrier = manager.Barrier(concurrency)
+        futures = [pool.submit(virtual_user, i, iterations, farmers, agrovets, password, barrier)
+                   for i in range(concurrency)]
+        outcomes = [future.result() for future in futures]
+
+    samples = [sample for outcome in outcomes for sample in outcome[0]]
+    failures = [failure for outcome in outcomes for failure in outcome[1]]
+    elapsed = max(o[3] for o in outcomes) - min(o[2] for o in outcomes)
+
+    latencies = np.array([seconds for _, seconds, _ in samples]) * 1000
+    errors = [(step, error) for step, _, error in samples if error]
+    return {
+        "concurrency": concurrency,
+        "reruns": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "error_rate": round(len(errors) / len(latencies), 4),
+        "errors": sorted(set(f"{step}: {error[:200]}" for step, error in errors)),
+        "failed_journeys": len(failures),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent AppTest load test for app.py")
+    parser.add_argument("--levels", nargs="+", type=int, default=[1, 2, 4, 8, 16], help="concurrent sessions per step")
+    parser.add_argument("--iterations", type=int, default=2, help="journeys per virtual user")
+    parser.add_argument("--password", default="demo123", help="password shared by the test accounts")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    farmers, agrovets = load_accounts(max(args.levels))
+    if not farmers or not agrovets:
+        print("Need farmer and agrovet accounts with stock; run seed_data.py or generate_data.py first")
+        return
+
+    print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    results = []
+    for level in args.levels:
+        result = run_level(level, args.iterations, farmers, agrovets, args.password)
+        results.append(result)
+        print(f"{level:8d} {result['reruns']:7d} {result['throughput_per_s']:8.2f} {result['p50_ms']:8.1f} "
+              f"{result['p95_ms']:8.1f} {result['p99_ms']:8.1f} {result['max_ms']:8.1f} {result['error_rate']:7.1%}")
+        for error in result["errors"][:5]:
+            print(f"         ! {error}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
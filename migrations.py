@@ -0,0 +1,152 @@
+"""
+Versioned schema migrations
+
+Base.metadata.create_all only creates missing tables; it never adds columns
+or indexes to tables that already exist. Every change to an existing table is
+registered here under an increasing version number and applied exactly once
+per database, in order, by run_migrations(). Migrations must be idempotent so
+that a fresh database (where create_all already built everything) can run
+them harmlessly.
+
+Run manually with: python migrations.py
+"""
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, select, insert, inspect, text
+from database import Base
+
+ADVISORY_LOCK_ID = 74201
+
+schema_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    schema_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a migration; the function receives a connection inside a transaction"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+def add_missing_column(conn, table_name, column_name):
+    """Add a column declared on a model to an existing table if the database lacks it"""
+    existing = [c["name"] for c in inspect(conn).get_columns(table_name)]
+    if column_name in existing:
+        return
+
+    column = Base.metadata.tables[table_name].c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+
+def drop_column_if_present(conn, table_name, column_name):
+    """Drop a column that is no longer declared on the model, if the database still has it"""
+    existing = [c["name"] for c in inspect(conn).get_columns(table_name)]
+    if column_name in existing:
+        conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {column_name}"))
+
+def create_declared_indexes(conn, table_name, names):
+    """Create the named indexes declared on a model's table if the database is missing them"""
+    for index in Base.metadata.tables[table_name].indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+@migration(1, "Composite and time-based indexes for hot query paths")
+def add_hot_path_indexes(conn):
+    indexes = {
+        "users": ["ix_users_role_active", "ix_users_created_at"],
+        "products": ["ix_products_agrovet_active_stock", "ix_products_active_category"],
+        "orders": ["ix_orders_agrovet_status_created", "ix_orders_farmer_status_created",
+                   "ix_orders_status_created", "ix_orders_created_at"],
+        "order_items": ["ix_order_items_order_id", "ix_order_items_product_id"],
+        "disease_detections": ["ix_disease_detections_user_created", "ix_disease_detections_created_at"],
+        "community_posts": ["ix_community_posts_created_at", "ix_community_posts_category_created"],
+        "comments": ["ix_comments_post_created"],
+        "customer_interactions": ["ix_customer_interactions_agrovet_created"],
+    }
+    for table_name, names in indexes.items():
+        create_declared_indexes(conn, table_name, names)
+
+@migration(2, "Backfill daily_sales rollup from completed orders")
+def backfill_daily_sales(conn):
+    from sales_rollup import backfill
+
+    # backfill() reads the line category that migration 5 fills in
+    add_missing_column(conn, "order_items", "category")
+    backfill(conn)
+
+@migration(3, "Full-text product search index")
+def add_product_search_index(conn):
+    from product_search import create_search_index
+
+    create_search_index(conn)
+
+@migration(4, "Product barcode/SKU column, unique per agrovet")
+def add_product_barcode(conn):
+    add_missing_column(conn, "products", "barcode")
+    create_declared_indexes(conn, "products", ["ux_products_agrovet_barcode"])
+
+@migration(5, "Snapshot the product category on each order line")
+def add_order_item_category(conn):
+    add_missing_column(conn, "order_items", "category")
+    conn.execute(text(
+        "UPDATE order_items SET category = "
+        "(SELECT COALESCE(products.category, '') FROM products WHERE products.id = order_items.product_id) "
+        "WHERE category IS NULL"
+    ))
+
+@migration(6, "Drop daily_sales.order_count")
+def drop_daily_sales_order_count(conn):
+    # Summed per product it counted a multi-line order once per line, and
+    # nothing read it
+    drop_column_if_present(conn, "daily_sales", "order_count")
+
+def applied_versions(conn):
+    """Versions already recorded in schema_migrations"""
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def run_migrations(engine):
+    """Apply pending migrations in version order, each in its own transaction"""
+    schema_metadata.create_all(bind=engine)
+
+    with engine.connect() as lock_conn:
+        # Several app processes may start at once against the same Postgres
+        # database; serialize them so each migration runs only once.
+        if engine.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock_conn.commit()
+
+        try:
+            done = applied_versions(lock_conn)
+            lock_conn.rollback()
+
+            for version, description, func in MIGRATIONS:
+                if version in done:
+                    continue
+
+                with engine.begin() as conn:
+                    func(conn)
+                    conn.execute(insert(schema_migrations).values(
+                        version=version,
+                        description=description,
+                        applied_at=datetime.utcnow()
+                    ))
+                print(f"Applied migration {version}: {description}")
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+                lock_conn.commit()
+
+if __name__ == "__main__":
+    from database import engine
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    print("✅ Database schema is up to date")
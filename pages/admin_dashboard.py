@@ -1,7 +1,9 @@
 import streamlit as st
 from sqlalchemy import func
-from database import User, Product, Order, CommunityPost, DiseaseDetection, OrderStatus, UserRole
+from database import User, Order, OrderStatus, UserRole
 from datetime import datetime, timedelta
+from aggregations import time_series, cumulative_series
+from dashboard_metrics import admin_summary
 import plotly.graph_objects as go
 
 def show():
@@ -13,86 +15,94 @@ def show():
     
     db = st.session_state.db
     
+    summary = admin_summary(db)
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_users = db.query(func.count(User.id)).filter(User.is_active == True).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_users}</h3><p>Active Users</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.active_users}</h3><p>Active Users</p></div>', unsafe_allow_html=True)
     
     with col2:
-        total_farmers = db.query(func.count(User.id)).filter(
-            User.role == UserRole.FARMER, User.is_active == True
-        ).scalar() or 0
+        total_farmers = summary.active_users_by_role.get(UserRole.FARMER, 0)
         st.markdown(f'<div class="stat-card"><h3>{total_farmers}</h3><p>Farmers</p></div>', unsafe_allow_html=True)
     
     with col3:
-        total_agrovets = db.query(func.count(User.id)).filter(
-            User.role == UserRole.AGROVET, User.is_active == True
-        ).scalar() or 0
+        total_agrovets = summary.active_users_by_role.get(UserRole.AGROVET, 0)
         st.markdown(f'<div class="stat-card"><h3>{total_agrovets}</h3><p>Agrovets</p></div>', unsafe_allow_html=True)
     
     with col4:
-        total_products = db.query(func.count(Product.id)).filter(Product.is_active == True).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_products}</h3><p>Products</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.active_products}</h3><p>Products</p></div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_orders = db.query(func.count(Order.id)).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_orders}</h3><p>Total Orders</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.orders.total}</h3><p>Total Orders</p></div>', unsafe_allow_html=True)
     
     with col2:
-        total_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.status == OrderStatus.COMPLETED
-        ).scalar() or 0
+        total_revenue = summary.orders[OrderStatus.COMPLETED].amount
         st.markdown(f'<div class="stat-card"><h3>${total_revenue:.2f}</h3><p>Total Revenue</p></div>', unsafe_allow_html=True)
     
     with col3:
-        total_posts = db.query(func.count(CommunityPost.id)).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_posts}</h3><p>Community Posts</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.total_posts}</h3><p>Community Posts</p></div>', unsafe_allow_html=True)
     
     with col4:
-        total_scans = db.query(func.count(DiseaseDetection.id)).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_scans}</h3><p>Disease Scans</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.total_scans}</h3><p>Disease Scans</p></div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("### 📈 User Growth (Last 30 Days)")
+        st.markdown("### 📈 User Growth")
         
-        days = []
-        counts = []
-        for i in range(29, -1, -1):
-            date = datetime.utcnow() - timedelta(days=i)
-            count = db.query(func.count(User.id)).filter(
-                User.created_at <= date
-            ).scalar() or 0
-            days.append(date.strftime('%m/%d'))
-            counts.append(count)
+        today = datetime.utcnow()
         
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=days, y=counts, mode='lines+markers', fill='tozeroy',
-                                line=dict(color='#16a34a', width=2)))
-        fig.update_layout(xaxis_title="Date", yaxis_title="Total Users", height=300)
-        st.plotly_chart(fig, use_container_width=True)
+        range_col, role_col = st.columns([3, 1])
+        with range_col:
+            growth_range = st.date_input("Period", value=(today.date() - timedelta(days=29), today.date()),
+                                         max_value=today.date(), key="growth_range")
+        with role_col:
+            by_role = st.checkbox("By role", key="growth_by_role")
+        
+        if len(growth_range) == 2:
+            growth_start, growth_end = growth_range
+            span = (growth_end - growth_start).days
+            granularity = "day" if span <= 92 else "week" if span <= 730 else "month"
+            
+            fig = go.Figure()
+            if by_role:
+                growth = cumulative_series(db, func.count(User.id), User.created_at, growth_start, growth_end,
+                                           granularity, partition_by=User.role)
+                colors = {UserRole.FARMER: '#16a34a', UserRole.AGROVET: '#f97316', UserRole.ADMIN: '#3b82f6'}
+                for role in UserRole:
+                    if role in growth:
+                        fig.add_trace(go.Scatter(x=[b for b, _ in growth[role]], y=[t for _, t in growth[role]],
+                                                 mode='lines', name=role.value.title(),
+                                                 line=dict(color=colors[role], width=2)))
+            else:
+                growth = cumulative_series(db, func.count(User.id), User.created_at, growth_start, growth_end,
+                                           granularity)
+                fig.add_trace(go.Scatter(x=[b for b, _ in growth], y=[t for _, t in growth],
+                                         mode='lines+markers', fill='tozeroy',
+                                         line=dict(color='#16a34a', width=2)))
+            fig.update_layout(xaxis_title="Date", yaxis_title="Total Users", height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Select an end date")
     
     with col2:
         st.markdown("### 💰 Revenue Trend (Last 7 Days)")
         
-        days = []
-        revenue = []
-        for i in range(6, -1, -1):
-            date = datetime.utcnow() - timedelta(days=i)
-            day_revenue = db.query(func.sum(Order.total_amount)).filter(
-                Order.status == OrderStatus.COMPLETED,
-                func.date(Order.created_at) == date.date()
-            ).scalar() or 0
-            days.append(date.strftime('%a'))
-            revenue.append(float(day_revenue))
+        revenue_series = time_series(
+            db, func.sum(Order.total_amount), Order.created_at,
+            today - timedelta(days=6), today, "day",
+            filters=[Order.status == OrderStatus.COMPLETED]
+        )
+        
+        days = [day.strftime('%a') for day, _ in revenue_series]
+        revenue = [float(day_revenue) for _, day_revenue in revenue_series]
         
         fig = go.Figure()
         fig.add_trace(go.Bar(x=days, y=revenue, marker_color='#16a34a'))
@@ -117,17 +127,12 @@ def show():
     with col2:
         st.markdown("### ⚠️ System Alerts")
         
-        pending_orders = db.query(func.count(Order.id)).filter(
-            Order.status == OrderStatus.PENDING
-        ).scalar() or 0
+        pending_orders = summary.orders.pending
         
         if pending_orders > 0:
             st.warning(f"⚠️ {pending_orders} pending orders need attention")
         
-        low_stock = db.query(func.count(Product.id)).filter(
-            Product.stock_quantity < 10,
-            Product.is_active == True
-        ).scalar() or 0
+        low_stock = summary.low_stock_products
         
         if low_stock > 0:
             st.warning(f"⚠️ {low_stock} products low on stock")
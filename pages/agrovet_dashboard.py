@@ -1,7 +1,10 @@
 import streamlit as st
 from sqlalchemy import func, desc
-from database import Product, Order, OrderStatus, CustomerInteraction
+from sqlalchemy.orm import joinedload, selectinload
+from database import Product, Order, OrderStatus, CustomerInteraction, DailySales
 from datetime import datetime, timedelta
+from aggregations import time_series
+from dashboard_metrics import agrovet_summary
 import plotly.graph_objects as go
 
 def show():
@@ -14,33 +17,21 @@ def show():
     user = st.session_state.user
     db = st.session_state.db
     
+    summary = agrovet_summary(db, user.id)
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_products = db.query(func.count(Product.id)).filter(
-            Product.agrovet_id == user.id
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_products}</h3><p>Products</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.total_products}</h3><p>Products</p></div>', unsafe_allow_html=True)
     
     with col2:
-        total_orders = db.query(func.count(Order.id)).filter(
-            Order.agrovet_id == user.id
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_orders}</h3><p>Total Orders</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.orders.total}</h3><p>Total Orders</p></div>', unsafe_allow_html=True)
     
     with col3:
-        pending_orders = db.query(func.count(Order.id)).filter(
-            Order.agrovet_id == user.id,
-            Order.status == OrderStatus.PENDING
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{pending_orders}</h3><p>Pending Orders</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.orders.pending}</h3><p>Pending Orders</p></div>', unsafe_allow_html=True)
     
     with col4:
-        total_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.agrovet_id == user.id,
-            Order.status == OrderStatus.COMPLETED
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>${total_revenue:.2f}</h3><p>Total Revenue</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>${summary.total_revenue:.2f}</h3><p>Total Revenue</p></div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -51,6 +42,9 @@ def show():
         
         recent_orders = db.query(Order).filter(
             Order.agrovet_id == user.id
+        ).options(
+            joinedload(Order.farmer),
+            selectinload(Order.order_items)
         ).order_by(desc(Order.created_at)).limit(5).all()
         
         if recent_orders:
@@ -73,22 +67,15 @@ def show():
     with col2:
         st.markdown("### 📊 Sales Trend (Last 7 Days)")
         
-        days = []
-        sales = []
-        for i in range(6, -1, -1):
-            date = datetime.utcnow() - timedelta(days=i)
-            day_start = date.replace(hour=0, minute=0, second=0)
-            day_end = date.replace(hour=23, minute=59, second=59)
-            
-            daily_sales = db.query(func.sum(Order.total_amount)).filter(
-                Order.agrovet_id == user.id,
-                Order.created_at >= day_start,
-                Order.created_at <= day_end,
-                Order.status == OrderStatus.COMPLETED
-            ).scalar() or 0
-            
-            days.append(date.strftime('%a'))
-            sales.append(float(daily_sales))
+        today = datetime.utcnow()
+        sales_series = time_series(
+            db, func.sum(DailySales.revenue), DailySales.day,
+            today - timedelta(days=6), today, "day",
+            filters=[DailySales.agrovet_id == user.id]
+        )
+        
+        days = [day.strftime('%a') for day, _ in sales_series]
+        sales = [float(daily_sales) for _, daily_sales in sales_series]
         
         fig = go.Figure()
         fig.add_trace(go.Bar(x=days, y=sales, marker_color='#16a34a'))
@@ -1,6 +1,8 @@
 import streamlit as st
-from database import Order, OrderStatus
-from sqlalchemy import desc
+from sqlalchemy.orm import joinedload, selectinload
+from database import Order, OrderItem, OrderStatus
+from pagination import paginate, pagination_controls
+from sales_rollup import record_status_change
 
 def show():
     if not st.session_state.user:
@@ -28,12 +30,16 @@ def show():
 def show_orders(db, status_filter=None):
     """Display orders with optional status filter"""
     
-    query = db.query(Order).filter(Order.agrovet_id == st.session_state.user.id)
+    query = db.query(Order).filter(Order.agrovet_id == st.session_state.user.id).options(
+        joinedload(Order.farmer),
+        selectinload(Order.order_items).joinedload(OrderItem.product)
+    )
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
     
-    orders = query.order_by(desc(Order.created_at)).all()
+    list_key = f"agrovet_orders_{status_filter.value if status_filter else 'all'}"
+    orders = paginate(query, Order, list_key)
     
     if orders:
         for order in orders:
@@ -83,15 +89,19 @@ def show_orders(db, status_filter=None):
                         "Update Status",
                         [status.value for status in OrderStatus],
                         index=[status.value for status in OrderStatus].index(order.status.value),
-                        key=f"status_{order.id}"
+                        key=f"status_{list_key}_{order.id}"
                     )
                 
                 with col_actions:
                     st.markdown("<br>", unsafe_allow_html=True)
-                    if st.button("💾 Update Order", key=f"update_{order.id}"):
+                    if st.button("💾 Update Order", key=f"update_{list_key}_{order.id}"):
+                        previous_status = order.status
                         order.status = OrderStatus(new_status)
+                        record_status_change(db, order, previous_status)
                         db.commit()
                         st.success(f"Order #{order.id} updated to {new_status}!")
                         st.rerun()
+        
+        pagination_controls(list_key)
     else:
         st.info("No orders found")
@@ -1,6 +1,7 @@
 import streamlit as st
-from database import Order, OrderStatus
-from sqlalchemy import desc
+from sqlalchemy.orm import joinedload, selectinload
+from database import Order, OrderItem, OrderStatus
+from pagination import paginate, pagination_controls
 
 def show():
     if not st.session_state.user or st.session_state.user.role.value != 'admin':
@@ -28,12 +29,17 @@ def show():
 def show_orders(db, status_filter=None):
     """Display all orders with optional status filter"""
     
-    query = db.query(Order)
+    query = db.query(Order).options(
+        joinedload(Order.farmer),
+        joinedload(Order.agrovet),
+        selectinload(Order.order_items).joinedload(OrderItem.product)
+    )
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
     
-    orders = query.order_by(desc(Order.created_at)).all()
+    list_key = f"all_orders_{status_filter.value if status_filter else 'all'}"
+    orders = paginate(query, Order, list_key)
     
     if orders:
         for order in orders:
@@ -74,5 +80,7 @@ def show_orders(db, status_filter=None):
                         st.write(f"${item.unit_price:.2f}")
                     with col_total:
                         st.write(f"${item.subtotal:.2f}")
+        
+        pagination_controls(list_key)
     else:
         st.info("No orders found")
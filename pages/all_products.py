@@ -1,5 +1,8 @@
 import streamlit as st
-from database import Product
+from sqlalchemy.orm import joinedload
+from database import Product, User
+from product_search import search as search_products, RESULT_LIMIT
+from pagination import paginate, pagination_controls
 
 def show():
     if not st.session_state.user or st.session_state.user.role.value != 'admin':
@@ -18,25 +21,21 @@ def show():
     with col2:
         show_inactive = st.checkbox("Show Inactive")
     
-    query = db.query(Product)
+    # Owner names arrive in the same query: a LEFT JOIN selecting only users.full_name
+    query = db.query(Product).options(joinedload(Product.agrovet).load_only(User.full_name))
     
     if not show_inactive:
         query = query.filter(Product.is_active == True)
     
+    # Searches show the best-ranked matches; browsing pages through the catalog newest first
+    list_key = f"all_products_{show_inactive}"
     if search:
-        query = query.filter(
-            (Product.name.ilike(f"%{search}%")) |
-            (Product.category.ilike(f"%{search}%")) |
-            (Product.manufacturer.ilike(f"%{search}%"))
-        )
-    
-    products = query.all()
+        products = search_products(query, search).limit(RESULT_LIMIT).all()
+    else:
+        products = paginate(query, Product, list_key)
     
     if products:
         for product in products:
-            agrovet_name = product.agrovet_id
-            agrovet = db.query(User).filter(User.id == agrovet_name).first() if agrovet_name else None
-            
             status_icon = "✅" if product.is_active else "❌"
             
             with st.expander(f"{status_icon} {product.name} - ${product.price:.2f} (Stock: {product.stock_quantity})"):
@@ -50,13 +49,14 @@ def show():
                 
                 with col2:
                     st.write(f"**Manufacturer:** {product.manufacturer or 'N/A'}")
-                    st.write(f"**Agrovet:** {agrovet.full_name if agrovet else 'Unknown'}")
+                    st.write(f"**Agrovet:** {product.agrovet.full_name if product.agrovet else 'Unknown'}")
                     st.write(f"**Status:** {'Active' if product.is_active else 'Inactive'}")
                     st.write(f"**Added:** {product.created_at.strftime('%Y-%m-%d')}")
                 
                 if product.description:
                     st.write(f"**Description:** {product.description}")
+        
+        if not search:
+            pagination_controls(list_key)
     else:
         st.info("No products found")
-
-from database import User
@@ -1,11 +1,22 @@
 import streamlit as st
-from database import Order, OrderStatus, Product, OrderItem
+from database import Product, DailySales
 from sqlalchemy import func
-from datetime import datetime, timedelta
+from datetime import datetime
+from aggregations import time_series, periods_ago
+from dashboard_metrics import agrovet_summary
+from analytics_engine import DIMENSIONS, snapshot_time, load_lines, revenue_series, top_products, category_revenue, slice_by
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 
+LINE_COLUMNS = ["order_id", "created_at", "status", "customer", "product_id", "product",
+                "category", "quantity", "subtotal"]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def sales_lines(agrovet_id, exported_at, start, end):
+    """An agrovet's snapshot lines from start to end; exported_at keys the cache to the snapshot"""
+    return load_lines(LINE_COLUMNS, agrovet_id=agrovet_id, start=start, end=end)
+
 def show():
     if not st.session_state.user:
         st.warning("Please login to view analytics")
@@ -14,56 +25,52 @@ def show():
     st.markdown('<div class="main-header"><h1>📈 Business Analytics</h1><p>Insights to grow your agrovet business</p></div>', unsafe_allow_html=True)
     
     db = st.session_state.db
+    agrovet_id = st.session_state.user.id
+    
+    summary = agrovet_summary(db, agrovet_id)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.agrovet_id == st.session_state.user.id,
-            Order.status == OrderStatus.COMPLETED
-        ).scalar() or 0
-        st.metric("Total Revenue", f"${total_revenue:.2f}")
+        st.metric("Total Revenue", f"${summary.total_revenue:.2f}")
     
     with col2:
-        total_orders = db.query(func.count(Order.id)).filter(
-            Order.agrovet_id == st.session_state.user.id
-        ).scalar() or 0
-        st.metric("Total Orders", total_orders)
+        st.metric("Total Orders", summary.orders.total)
     
     with col3:
-        avg_order = total_revenue / total_orders if total_orders > 0 else 0
-        st.metric("Average Order", f"${avg_order:.2f}")
+        st.metric("Average Order", f"${summary.average_order:.2f}")
     
     with col4:
-        this_month_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.agrovet_id == st.session_state.user.id,
-            Order.status == OrderStatus.COMPLETED,
-            Order.created_at >= datetime.utcnow().replace(day=1)
-        ).scalar() or 0
-        st.metric("This Month", f"${this_month_revenue:.2f}")
+        st.metric("This Month", f"${summary.month_revenue:.2f}")
     
     st.markdown("---")
     
+    # Charts cover the last 7 months and come from the Parquet snapshot once
+    # analytics_snapshot.py has run
+    today = datetime.utcnow()
+    start = periods_ago(today, 7, "month")
+    as_of = snapshot_time()
+    lines = None
+    if as_of:
+        lines = sales_lines(agrovet_id, as_of, start, today.date())
+        st.caption(f"Charts below reflect sales up to {as_of.strftime('%Y-%m-%d %H:%M')} UTC")
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### 📊 Monthly Revenue Trend")
         
-        monthly_data = []
-        for i in range(6, -1, -1):
-            date = datetime.utcnow() - timedelta(days=i*30)
-            month_start = date.replace(day=1)
-            
-            revenue = db.query(func.sum(Order.total_amount)).filter(
-                Order.agrovet_id == st.session_state.user.id,
-                Order.status == OrderStatus.COMPLETED,
-                Order.created_at >= month_start
-            ).scalar() or 0
-            
-            monthly_data.append({
-                'month': month_start.strftime('%b %Y'),
-                'revenue': float(revenue)
-            })
+        if lines is not None:
+            monthly_revenue = revenue_series(lines, start, today, "month")
+        else:
+            monthly_revenue = time_series(
+                db, func.sum(DailySales.revenue), DailySales.day,
+                start, today, "month",
+                filters=[DailySales.agrovet_id == agrovet_id]
+            )
+        
+        monthly_data = [{'month': month.strftime('%b %Y'), 'revenue': float(revenue)}
+                        for month, revenue in monthly_revenue]
         
         df = pd.DataFrame(monthly_data)
         fig = px.line(df, x='month', y='revenue', markers=True)
@@ -73,16 +80,21 @@ def show():
     with col2:
         st.markdown("### 📦 Top Selling Products")
         
-        top_products = db.query(
-            Product.name,
-            func.sum(OrderItem.quantity).label('total_sold')
-        ).join(OrderItem).filter(
-            Product.agrovet_id == st.session_state.user.id
-        ).group_by(Product.name).order_by(func.sum(OrderItem.quantity).desc()).limit(5).all()
+        if lines is not None:
+            best_sellers = top_products(lines, 5)
+            top = list(zip(best_sellers["product"], best_sellers["units"]))
+        else:
+            top = db.query(
+                Product.name,
+                func.sum(DailySales.units_sold).label('total_sold')
+            ).join(Product, DailySales.product_id == Product.id).filter(
+                DailySales.agrovet_id == agrovet_id,
+                DailySales.day >= start
+            ).group_by(Product.id, Product.name).order_by(func.sum(DailySales.units_sold).desc()).limit(5).all()
         
-        if top_products:
-            products = [p.name for p in top_products]
-            quantities = [p.total_sold for p in top_products]
+        if top:
+            products = [name for name, _ in top]
+            quantities = [int(units) for _, units in top]
             
             fig = go.Figure(data=[go.Bar(x=products, y=quantities, marker_color='#16a34a')])
             fig.update_layout(xaxis_title="Product", yaxis_title="Units Sold", height=300)
@@ -97,14 +109,7 @@ def show():
     with col1:
         st.markdown("### 🎯 Order Status Distribution")
         
-        status_counts = {}
-        for status in OrderStatus:
-            count = db.query(func.count(Order.id)).filter(
-                Order.agrovet_id == st.session_state.user.id,
-                Order.status == status
-            ).scalar() or 0
-            if count > 0:
-                status_counts[status.value.title()] = count
+        status_counts = summary.orders.distribution()
         
         if status_counts:
             fig = go.Figure(data=[go.Pie(labels=list(status_counts.keys()), values=list(status_counts.values()))])
@@ -116,20 +121,49 @@ def show():
     with col2:
         st.markdown("### 💰 Revenue by Category")
         
-        category_revenue = db.query(
-            Product.category,
-            func.sum(OrderItem.subtotal).label('revenue')
-        ).join(OrderItem).join(Order).filter(
-            Product.agrovet_id == st.session_state.user.id,
-            Order.status == OrderStatus.COMPLETED
-        ).group_by(Product.category).all()
+        if lines is not None:
+            by_category = list(category_revenue(lines).items())
+        else:
+            by_category = db.query(
+                DailySales.category,
+                func.sum(DailySales.revenue).label('revenue')
+            ).filter(
+                DailySales.agrovet_id == agrovet_id,
+                DailySales.day >= start
+            ).group_by(DailySales.category).all()
         
-        if category_revenue:
-            categories = [c.category or 'Uncategorized' for c in category_revenue]
-            revenues = [float(c.revenue) for c in category_revenue]
+        if by_category:
+            categories = [category or 'Uncategorized' for category, _ in by_category]
+            revenues = [float(revenue) for _, revenue in by_category]
             
             fig = go.Figure(data=[go.Pie(labels=categories, values=revenues)])
             fig.update_layout(height=300)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No category data available")
+    
+    if as_of:
+        st.markdown("---")
+        
+        st.markdown("### 🔎 Explore Sales")
+        
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            dimension = st.selectbox("Group by", list(DIMENSIONS), key="explore_dimension")
+        with col2:
+            period = st.date_input("Period", value=(periods_ago(today, 12, "month"), today.date()),
+                                   max_value=today.date(), key="explore_period")
+        
+        if len(period) == 2:
+            breakdown = slice_by(sales_lines(agrovet_id, as_of, period[0], period[1]), DIMENSIONS[dimension])
+            
+            if breakdown.empty:
+                st.info("No completed sales in this period")
+            else:
+                top_rows = breakdown.head(20)
+                fig = go.Figure(data=[go.Bar(x=top_rows.index.astype(str), y=top_rows["revenue"], marker_color='#16a34a')])
+                fig.update_layout(xaxis_title=dimension, yaxis_title="Revenue ($)", height=300)
+                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(breakdown, use_container_width=True)
+        else:
+            st.info("Select an end date")
@@ -1,6 +1,9 @@
 import streamlit as st
+from sqlalchemy.orm import joinedload, selectinload
 from database import CommunityPost, Comment
-from sqlalchemy import desc
+from pagination import paginate, pagination_controls
+from image_processing import prepare_image
+from blob_store import put, image_source
 from datetime import datetime
 
 def show():
@@ -24,12 +27,16 @@ def show_feed():
     
     category_filter = st.selectbox("Filter by Category", ["All", "Question", "Experience", "Tips", "Market Info", "Success Story"])
     
-    query = db.query(CommunityPost).order_by(desc(CommunityPost.created_at))
+    query = db.query(CommunityPost).options(
+        joinedload(CommunityPost.author),
+        selectinload(CommunityPost.comments).joinedload(Comment.author)
+    )
     
     if category_filter != "All":
         query = query.filter(CommunityPost.category == category_filter)
     
-    posts = query.all()
+    list_key = f"community_{category_filter}"
+    posts = paginate(query, CommunityPost, list_key, default_page_size=10)
     
     if posts:
         for post in posts:
@@ -47,7 +54,7 @@ def show_feed():
                 st.write(post.content)
                 
                 if post.image_url:
-                    st.image(post.image_url, use_container_width=True)
+                    st.image(image_source(post.image_url, "card"), use_container_width=True)
                 
                 col_like, col_comment = st.columns([1, 3])
                 
@@ -79,6 +86,8 @@ def show_feed():
                                 st.rerun()
                 
                 st.markdown("---")
+        
+        pagination_controls(list_key)
     else:
         st.info("No posts yet. Be the first to share!")
 
@@ -90,6 +99,7 @@ def create_post():
         title = st.text_input("Post Title", placeholder="Give your post a catchy title...")
         category = st.selectbox("Category", ["Question", "Experience", "Tips", "Market Info", "Success Story"])
         content = st.text_area("Content", placeholder="Share your thoughts, experiences, or questions...", height=200)
+        photo = st.file_uploader("Photo (optional)", type=['jpg', 'jpeg', 'png'])
         
         submit = st.form_submit_button("📝 Publish Post", use_container_width=True)
         
@@ -99,11 +109,23 @@ def create_post():
             else:
                 db = st.session_state.db
                 
+                image_url = None
+                if photo:
+                    try:
+                        image_url = put(prepare_image(photo.getvalue()).data)
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                        return
+                    except OSError as e:
+                        st.error(f"Could not store the photo: {str(e)}")
+                        return
+                
                 post = CommunityPost(
                     author_id=st.session_state.user.id,
                     title=title,
                     content=content,
                     category=category,
+                    image_url=image_url,
                     created_at=datetime.utcnow()
                 )
                 
@@ -1,7 +1,9 @@
 import streamlit as st
 from database import User, UserRole, Order, CustomerInteraction
 from sqlalchemy import func, desc
+from sqlalchemy.orm import joinedload
 from datetime import datetime
+from pagination import paginate_with, pagination_controls
 
 def show():
     if not st.session_state.user:
@@ -20,36 +22,78 @@ def show():
     with tab2:
         show_interactions(db)
 
-def show_customers(db):
-    """Display customer list with purchase history"""
-    
-    st.markdown("### Customer Database")
-    
-    search = st.text_input("🔍 Search customers", placeholder="Search by name, location...")
-    
-    query = db.query(User).filter(User.role == UserRole.FARMER, User.is_active == True)
-    
+CUSTOMER_SORTS = {
+    "Total Spent": "total_spent",
+    "Orders": "orders",
+    "Last Order": "last_order",
+    "Average Order": "average_order",
+    "Name": "name",
+}
+
+def customer_summaries(db, agrovet_id, search, sort, page_size, offset=None):
+    """
+    One page of this agrovet's customers with their order totals
+
+    Orders are grouped by farmer in a single query returning
+    (User, orders, total_spent, last_order, average_order) rows, sorted by
+    one of CUSTOMER_SORTS. The cursor is the offset of the next page.
+    """
+    orders = func.count(Order.id).label("orders")
+    total_spent = func.coalesce(func.sum(Order.total_amount), 0).label("total_spent")
+    last_order = func.max(Order.created_at).label("last_order")
+    average_order = func.coalesce(func.avg(Order.total_amount), 0).label("average_order")
+
+    query = db.query(User, orders, total_spent, last_order, average_order).join(
+        Order, Order.farmer_id == User.id
+    ).filter(
+        Order.agrovet_id == agrovet_id,
+        User.role == UserRole.FARMER,
+        User.is_active == True
+    )
+
     if search:
         query = query.filter(
             (User.full_name.ilike(f"%{search}%")) | 
             (User.location.ilike(f"%{search}%")) |
             (User.username.ilike(f"%{search}%"))
         )
+
+    columns = {"orders": orders, "total_spent": total_spent, "last_order": last_order, "average_order": average_order}
+    if sort == "name":
+        ordering = [User.full_name.asc(), User.id.asc()]
+    else:
+        ordering = [columns[sort].desc(), User.id.asc()]
+
+    offset = offset or 0
+    rows = query.group_by(User.id).order_by(*ordering).offset(offset).limit(page_size + 1).all()
+
+    if len(rows) > page_size:
+        return rows[:page_size], offset + page_size
+    return rows, None
+
+def show_customers(db):
+    """Display this agrovet's customers with their purchase history"""
+    
+    st.markdown("### Customer Database")
     
-    customers = query.all()
+    agrovet_id = st.session_state.user.id
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        search = st.text_input("🔍 Search customers", placeholder="Search by name, location...")
+    with col2:
+        sort_label = st.selectbox("Sort by", list(CUSTOMER_SORTS), key="crm_sort")
+    sort = CUSTOMER_SORTS[sort_label]
+    
+    list_key = "crm_customers"
+    customers = paginate_with(
+        lambda page_size, after: customer_summaries(db, agrovet_id, search, sort, page_size, after),
+        list_key,
+        filters=(sort, search)
+    )
     
     if customers:
-        for customer in customers:
-            total_orders = db.query(func.count(Order.id)).filter(
-                Order.farmer_id == customer.id,
-                Order.agrovet_id == st.session_state.user.id
-            ).scalar() or 0
-            
-            total_spent = db.query(func.sum(Order.total_amount)).filter(
-                Order.farmer_id == customer.id,
-                Order.agrovet_id == st.session_state.user.id
-            ).scalar() or 0
-            
+        for customer, total_orders, total_spent, last_order, average_order in customers:
             with st.expander(f"👤 {customer.full_name} - {total_orders} orders - ${total_spent:.2f} spent"):
                 col1, col2 = st.columns(2)
                 
@@ -63,19 +107,21 @@ def show_customers(db):
                 with col2:
                     st.write(f"**Total Orders:** {total_orders}")
                     st.write(f"**Total Spent:** ${total_spent:.2f}")
-                    st.write(f"**Average Order:** ${(total_spent / total_orders if total_orders > 0 else 0):.2f}")
+                    st.write(f"**Average Order:** ${average_order:.2f}")
+                    st.write(f"**Last Order:** {last_order.strftime('%Y-%m-%d')}")
                 
                 st.markdown("#### Recent Orders")
-                recent_orders = db.query(Order).filter(
-                    Order.farmer_id == customer.id,
-                    Order.agrovet_id == st.session_state.user.id
-                ).order_by(desc(Order.created_at)).limit(3).all()
                 
-                if recent_orders:
+                # Expanders render their content even when collapsed, so
+                # order history is only fetched on request
+                if st.toggle("Show recent orders", key=f"recent_{customer.id}"):
+                    recent_orders = db.query(Order).filter(
+                        Order.farmer_id == customer.id,
+                        Order.agrovet_id == agrovet_id
+                    ).order_by(desc(Order.created_at)).limit(3).all()
+                    
                     for order in recent_orders:
                         st.write(f"- Order #{order.id}: ${order.total_amount:.2f} ({order.created_at.strftime('%Y-%m-%d')}) - {order.status.value}")
-                else:
-                    st.info("No orders yet")
                 
                 st.markdown("---")
                 
@@ -90,7 +136,7 @@ def show_customers(db):
                     if st.form_submit_button("💾 Save Interaction"):
                         if notes:
                             interaction = CustomerInteraction(
-                                agrovet_id=st.session_state.user.id,
+                                agrovet_id=agrovet_id,
                                 farmer_id=customer.id,
                                 interaction_type=interaction_type,
                                 notes=notes,
@@ -100,6 +146,8 @@ def show_customers(db):
                             db.commit()
                             st.success("Interaction recorded!")
                             st.rerun()
+        
+        pagination_controls(list_key)
     else:
         st.info("No customers found")
 
@@ -110,11 +158,13 @@ def show_interactions(db):
     
     interactions = db.query(CustomerInteraction).filter(
         CustomerInteraction.agrovet_id == st.session_state.user.id
+    ).options(
+        joinedload(CustomerInteraction.farmer).load_only(User.full_name)
     ).order_by(desc(CustomerInteraction.created_at)).limit(20).all()
     
     if interactions:
         for interaction in interactions:
-            farmer = db.query(User).filter(User.id == interaction.farmer_id).first()
+            farmer = interaction.farmer
             
             with st.container():
                 col1, col2 = st.columns([3, 1])
@@ -1,11 +1,33 @@
+import time
+import pandas as pd
 import streamlit as st
 from streamlit_camera_input_live import camera_input_live
-from PIL import Image
-import io
 from ai_helper import analyze_plant_disease, search_product_images
+from image_processing import prepare_image, format_size
+from diagnosis_cache import confidence, diagnose
+from blob_store import put
+from field_survey import analyze_survey, save_survey, MAX_SURVEY_IMAGES
 from database import DiseaseDetection
 from datetime import datetime
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def prepare(image_bytes):
+    """Preprocess an image once per distinct upload instead of on every rerun"""
+    return prepare_image(image_bytes)
+
+def show_prepared(image_bytes, caption):
+    """Render the preprocessed image with its size savings; returns it, or None if unreadable"""
+    try:
+        prepared = prepare(image_bytes)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return None
+    
+    st.image(prepared.data, caption=caption, use_container_width=True)
+    st.caption(f"📉 Optimized for analysis: {format_size(prepared.original_bytes)} → "
+               f"{format_size(prepared.processed_bytes)} ({prepared.width}×{prepared.height})")
+    return prepared
+
 def show():
     if not st.session_state.user:
         st.warning("Please login to use disease detection")
@@ -15,7 +37,7 @@ def show():
     
     st.info("💡 **Tip:** Take clear, well-lit photos of affected plant parts for best results. The AI will analyze the image and provide detailed diagnosis and treatment recommendations.")
     
-    tab1, tab2 = st.tabs(["📸 Camera Capture", "📤 Upload Image"])
+    tab1, tab2, tab3 = st.tabs(["📸 Camera Capture", "📤 Upload Image", "🗂️ Field Survey"])
     
     with tab1:
         st.markdown("### Use Your Camera")
@@ -24,41 +46,46 @@ def show():
         image = camera_input_live()
         
         if image:
-            st.image(image, caption="Captured Plant Image", use_container_width=True)
+            prepared = show_prepared(image.getvalue(), "Captured Plant Image")
             
-            if st.button("🔍 Analyze This Image", key="analyze_camera", type="primary", use_container_width=True):
-                analyze_image(image)
+            if prepared and st.button("🔍 Analyze This Image", key="analyze_camera", type="primary", use_container_width=True):
+                analyze_image(prepared.data)
     
     with tab2:
         st.markdown("### Upload an Image")
         uploaded_file = st.file_uploader("Choose a plant image...", type=['jpg', 'jpeg', 'png'])
         
         if uploaded_file:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Uploaded Plant Image", use_container_width=True)
+            prepared = show_prepared(uploaded_file.getvalue(), "Uploaded Plant Image")
             
-            if st.button("🔍 Analyze This Image", key="analyze_upload", type="primary", use_container_width=True):
-                img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format='JPEG')
-                img_byte_arr = img_byte_arr.getvalue()
-                analyze_image(img_byte_arr)
+            if prepared and st.button("🔍 Analyze This Image", key="analyze_upload", type="primary", use_container_width=True):
+                analyze_image(prepared.data)
+    
+    with tab3:
+        show_survey()
+    
+    # Kept across reruns so the buttons below the results still see them
+    if st.session_state.get('diagnosis'):
+        show_diagnosis(**st.session_state.diagnosis)
 
-def analyze_image(image_data):
-    """Analyze the plant image and display results"""
+def analyze_image(image_bytes):
+    """Analyze the preprocessed plant image (JPEG bytes) and keep the result for display"""
+    st.session_state.diagnosis = None
     
     with st.spinner("🔬 Analyzing plant image with AI... This may take a moment."):
-        if isinstance(image_data, bytes):
-            image_bytes = image_data
-        else:
-            image_bytes = image_data.getvalue()
-        
-        result = analyze_plant_disease(image_bytes)
+        result, distance = diagnose(image_bytes, analyze_plant_disease)
     
-    if "error" in result and result.get("confidence", 0) == 0:
+    if "error" in result and confidence(result) == 0:
         st.error(f"❌ Analysis Error: {result.get('symptoms', 'Unknown error')}")
         return
     
+    st.session_state.diagnosis = {"result": result, "distance": distance, "image_bytes": image_bytes}
+
+def show_diagnosis(result, distance, image_bytes, saved=False):
+    """Display an analysis result with the option to save it"""
     st.success("✅ Analysis Complete!")
+    if distance is not None:
+        st.caption("⚡ This photo matches one analyzed before, so the saved diagnosis was reused")
     
     st.markdown("---")
     
@@ -68,18 +95,18 @@ def analyze_image(image_data):
         st.markdown(f"## 🌿 {result.get('plant_type', 'Plant')}")
         
         disease = result.get('disease_name', 'Unknown')
-        confidence = result.get('confidence', 0)
+        score = confidence(result)
         severity = result.get('severity', 'Unknown')
         
         if disease.lower() == 'healthy':
             st.markdown(f"### ✅ Status: **{disease}**")
-            st.success(f"Confidence: {confidence*100:.1f}%")
+            st.success(f"Confidence: {score*100:.1f}%")
         else:
             st.markdown(f"### ⚠️ Disease Detected: **{disease}**")
-            st.warning(f"Confidence: {confidence*100:.1f}% | Severity: **{severity}**")
+            st.warning(f"Confidence: {score*100:.1f}% | Severity: **{severity}**")
     
     with col2:
-        confidence_pct = confidence * 100
+        confidence_pct = score * 100
         color = "#16a34a" if confidence_pct > 80 else "#f59e0b" if confidence_pct > 60 else "#ef4444"
         st.markdown(f"""
         <div style='text-align: center; padding: 20px; background: {color}; color: white; border-radius: 10px;'>
@@ -120,17 +147,91 @@ def analyze_image(image_data):
         st.markdown("### Prevention Measures")
         st.write(result.get('prevention', 'No prevention information available'))
     
-    if st.button("💾 Save This Diagnosis", type="primary", use_container_width=True):
-        save_diagnosis(result, image_bytes)
+    if saved:
+        st.info("💾 Diagnosis saved. You can view it in your dashboard.")
+    elif st.button("💾 Save This Diagnosis", type="primary", use_container_width=True):
+        if save_diagnosis(result, image_bytes):
+            st.session_state.diagnosis["saved"] = True
+
+def show_survey():
+    """Analyze every photo from one field walk and save the diagnoses"""
+    st.markdown("### Analyze a Field Survey")
+    st.write(f"Upload up to {MAX_SURVEY_IMAGES} photos from one field walk. They are analyzed in parallel and every diagnosis is saved to your history.")
+    
+    files = st.file_uploader("Choose plant images...", type=['jpg', 'jpeg', 'png'], accept_multiple_files=True, key="survey_files")
+    
+    if files:
+        if len(files) > MAX_SURVEY_IMAGES:
+            st.warning(f"Only the first {MAX_SURVEY_IMAGES} of {len(files)} photos will be analyzed")
+            files = files[:MAX_SURVEY_IMAGES]
+        
+        if st.button(f"🔍 Analyze {len(files)} Images", key="analyze_survey", type="primary", use_container_width=True):
+            run_survey(files)
+    
+    survey = st.session_state.get('survey')
+    if survey:
+        st.success(f"✅ {survey['saved']} of {len(survey['table'])} photos diagnosed and saved in {survey['seconds']:.0f}s")
+        st.dataframe(survey['table'], hide_index=True, use_container_width=True)
+        
+        diseases = survey['table'][survey['table']['Status'] != '❌ Failed']['Disease'].value_counts()
+        if not diseases.empty:
+            st.markdown("#### 🦠 Findings")
+            st.bar_chart(diseases)
+
+def survey_table(results):
+    """One row per analyzed photo, in the order they finished"""
+    return pd.DataFrame([
+        {
+            "Photo": r.name,
+            "Plant": r.result.get('plant_type', 'Unknown') if r.ok else "",
+            "Disease": r.result.get('disease_name', 'Unknown') if r.ok else "",
+            "Confidence": f"{confidence(r.result) * 100:.0f}%" if r.ok else "",
+            "Severity": r.result.get('severity', 'Unknown') if r.ok else "",
+            "Status": ("⚡ Reused" if r.cached else "✅ Analyzed") if r.ok else "❌ Failed",
+            "Note": r.error or "",
+        }
+        for r in results
+    ])
+
+def run_survey(files):
+    """Stream survey results into the page as they finish, then save them together"""
+    st.session_state.survey = None
+    progress = st.progress(0.0, text=f"Analyzing {len(files)} photos...")
+    table = st.empty()
+    
+    started = time.perf_counter()
+    results = []
+    for result in analyze_survey([(f.name, f.getvalue()) for f in files]):
+        results.append(result)
+        progress.progress(len(results) / len(files), text=f"Analyzed {len(results)} of {len(files)} photos")
+        table.dataframe(survey_table(results), hide_index=True, use_container_width=True)
+    
+    db = st.session_state.db
+    try:
+        saved = save_survey(db, st.session_state.user.id, results)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        st.error(f"Error saving survey: {str(e)}")
+        return
+    
+    progress.empty()
+    table.empty()
+    st.session_state.survey = {
+        "table": survey_table(results),
+        "saved": saved,
+        "seconds": time.perf_counter() - started,
+    }
 
 def save_diagnosis(result, image_bytes):
-    """Save diagnosis to database"""
+    """Save diagnosis and the analyzed image; returns whether it was saved"""
     try:
         detection = DiseaseDetection(
             user_id=st.session_state.user.id,
+            image_path=put(image_bytes),
             plant_type=result.get('plant_type', 'Unknown'),
             disease_name=result.get('disease_name', 'Unknown'),
-            confidence_score=result.get('confidence', 0),
+            confidence_score=confidence(result),
             severity=result.get('severity', 'Unknown'),
             symptoms=result.get('symptoms', ''),
             causes=result.get('causes', ''),
@@ -143,6 +244,9 @@ def save_diagnosis(result, image_bytes):
         st.session_state.db.commit()
         
         st.success("✅ Diagnosis saved successfully! You can view it in your dashboard.")
+        return True
         
     except Exception as e:
+        st.session_state.db.rollback()
         st.error(f"Error saving diagnosis: {str(e)}")
+        return False
@@ -1,7 +1,8 @@
 import streamlit as st
-from sqlalchemy import func, desc
+from sqlalchemy import desc
 from database import DiseaseDetection, Order, OrderStatus
-from datetime import datetime, timedelta
+from dashboard_metrics import farmer_summary
+from blob_store import image_source
 import plotly.graph_objects as go
 
 def show():
@@ -14,33 +15,21 @@ def show():
     user = st.session_state.user
     db = st.session_state.db
     
+    summary = farmer_summary(db, user.id)
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_scans = db.query(func.count(DiseaseDetection.id)).filter(
-            DiseaseDetection.user_id == user.id
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_scans}</h3><p>Disease Scans</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.total_scans}</h3><p>Disease Scans</p></div>', unsafe_allow_html=True)
     
     with col2:
-        total_orders = db.query(func.count(Order.id)).filter(
-            Order.farmer_id == user.id
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{total_orders}</h3><p>Total Orders</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.orders.total}</h3><p>Total Orders</p></div>', unsafe_allow_html=True)
     
     with col3:
-        pending_orders = db.query(func.count(Order.id)).filter(
-            Order.farmer_id == user.id,
-            Order.status == OrderStatus.PENDING
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{pending_orders}</h3><p>Pending Orders</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.orders.pending}</h3><p>Pending Orders</p></div>', unsafe_allow_html=True)
     
     with col4:
-        recent_diseases = db.query(func.count(DiseaseDetection.id)).filter(
-            DiseaseDetection.user_id == user.id,
-            DiseaseDetection.created_at >= datetime.utcnow() - timedelta(days=7)
-        ).scalar() or 0
-        st.markdown(f'<div class="stat-card"><h3>{recent_diseases}</h3><p>This Week</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>{summary.scans_this_week}</h3><p>This Week</p></div>', unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -56,6 +45,8 @@ def show():
         if recent_detections:
             for detection in recent_detections:
                 with st.expander(f"🌿 {detection.disease_name or 'Unknown'} - {detection.created_at.strftime('%Y-%m-%d')}"):
+                    if detection.image_path:
+                        st.image(image_source(detection.image_path), width=160)
                     st.write(f"**Plant:** {detection.plant_type or 'Not specified'}")
                     st.write(f"**Confidence:** {(detection.confidence_score or 0) * 100:.1f}%")
                     st.write(f"**Severity:** {detection.severity or 'Unknown'}")
@@ -1,6 +1,9 @@
 import streamlit as st
+from sqlalchemy.exc import IntegrityError
 from database import Product
 from datetime import datetime
+from product_search import search as search_products
+from catalog_cache import bump_catalog_version
 
 def show():
     if not st.session_state.user:
@@ -38,7 +41,7 @@ def show_products(db):
         query = query.filter(Product.is_active == True)
     
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        query = search_products(query, search)
     
     products = query.all()
     
@@ -59,6 +62,7 @@ def show_products(db):
                     new_price = st.number_input("Price ($)", min_value=0.01, value=float(product.price), step=0.01, key=f"price_{product.id}")
                     new_stock = st.number_input("Stock Quantity", min_value=0, value=product.stock_quantity, key=f"stock_{product.id}")
                     new_manufacturer = st.text_input("Manufacturer", value=product.manufacturer or "", key=f"mfg_{product.id}")
+                    new_barcode = st.text_input("Barcode / SKU", value=product.barcode or "", key=f"barcode_{product.id}")
                     new_active = st.checkbox("Active", value=product.is_active, key=f"active_{product.id}")
                 
                 col_update, col_delete = st.columns(2)
@@ -71,15 +75,23 @@ def show_products(db):
                         product.price = new_price
                         product.stock_quantity = new_stock
                         product.manufacturer = new_manufacturer
+                        product.barcode = new_barcode.strip() or None
                         product.is_active = new_active
-                        db.commit()
-                        st.success(f"Updated {product.name}!")
-                        st.rerun()
+                        try:
+                            db.commit()
+                        except IntegrityError:
+                            db.rollback()
+                            st.error(f"Barcode {new_barcode.strip()} is already used by another of your products")
+                        else:
+                            bump_catalog_version()
+                            st.success(f"Updated {product.name}!")
+                            st.rerun()
                 
                 with col_delete:
                     if st.button("🗑️ Delete", key=f"delete_{product.id}", use_container_width=True):
                         db.delete(product)
                         db.commit()
+                        bump_catalog_version()
                         st.success("Product deleted!")
                         st.rerun()
     else:
@@ -102,6 +114,7 @@ def add_product(db):
             price = st.number_input("Price ($) *", min_value=0.01, value=10.00, step=0.01)
             stock_quantity = st.number_input("Initial Stock Quantity *", min_value=0, value=100)
             manufacturer = st.text_input("Manufacturer", placeholder="e.g., AgriTech Inc.")
+            barcode = st.text_input("Barcode / SKU", placeholder="Scan or type the product barcode")
         
         submit = st.form_submit_button("➕ Add Product", use_container_width=True)
         
@@ -116,14 +129,21 @@ def add_product(db):
                     price=price,
                     stock_quantity=stock_quantity,
                     manufacturer=manufacturer,
+                    barcode=barcode.strip() or None,
                     agrovet_id=st.session_state.user.id,
                     created_at=datetime.utcnow(),
                     is_active=True
                 )
                 
                 db.add(product)
-                db.commit()
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    st.error(f"Barcode {barcode.strip()} is already used by another of your products")
+                    return
                 
+                bump_catalog_version()
                 st.success(f"✅ Product '{name}' added successfully!")
                 st.balloons()
                 
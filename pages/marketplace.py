@@ -1,6 +1,9 @@
 import streamlit as st
-from database import Product, Order, OrderItem, OrderStatus
-from datetime import datetime
+from database import OrderStatus
+from checkout import create_order, OutOfStockError
+from catalog_cache import catalog_page, search_catalog, bump_catalog_version
+from pagination import paginate_with, pagination_controls
+from blob_store import image_source, placeholder
 
 def show():
     if not st.session_state.user:
@@ -27,16 +30,15 @@ def show():
     with col_products:
         st.markdown("### 📦 Available Products")
         
-        db = st.session_state.db
-        query = db.query(Product).filter(Product.is_active == True, Product.stock_quantity > 0)
-        
+        list_key = f"marketplace_{category_filter}"
         if search:
-            query = query.filter(Product.name.ilike(f"%{search}%"))
-        
-        if category_filter != "All":
-            query = query.filter(Product.category == category_filter)
-        
-        products = query.all()
+            products = search_catalog(category_filter, search)
+        else:
+            products = paginate_with(
+                lambda page_size, after: catalog_page(category_filter, page_size, after),
+                list_key,
+                default_page_size=10
+            )
         
         if products:
             for product in products:
@@ -44,10 +46,7 @@ def show():
                     col_img, col_info, col_action = st.columns([1, 3, 1])
                     
                     with col_img:
-                        if product.image_url:
-                            st.image(product.image_url, use_container_width=True)
-                        else:
-                            st.image(f"https://via.placeholder.com/150?text={product.name[:10]}", use_container_width=True)
+                        st.image(image_source(product.image_url, fallback_text=product.name), use_container_width=True)
                     
                     with col_info:
                         st.markdown(f"### {product.name}")
@@ -64,6 +63,9 @@ def show():
                             add_to_cart(product, quantity)
                     
                     st.markdown("---")
+            
+            if not search:
+                pagination_controls(list_key)
         else:
             st.info("No products found matching your criteria")
     
@@ -95,7 +97,7 @@ def show():
                     place_order(delivery_address, notes, total)
         else:
             st.info("Your cart is empty. Add products to get started!")
-            st.image("https://via.placeholder.com/200?text=Empty+Cart", use_container_width=True)
+            st.image(placeholder("Empty Cart"), use_container_width=True)
 
 def add_to_cart(product, quantity):
     """Add product to cart"""
@@ -118,42 +120,29 @@ def place_order(delivery_address, notes, total):
     try:
         db = st.session_state.db
         
-        order = Order(
+        order_id = create_order(
+            db,
+            st.session_state.cart,
             farmer_id=st.session_state.user.id,
             total_amount=total,
             status=OrderStatus.PENDING,
             delivery_address=delivery_address,
-            notes=notes,
-            created_at=datetime.utcnow()
+            notes=notes
         )
-        
-        db.add(order)
-        db.flush()
-        
-        for item in st.session_state.cart:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item['id'],
-                quantity=item['quantity'],
-                unit_price=item['price'],
-                subtotal=item['quantity'] * item['price']
-            )
-            db.add(order_item)
-            
-            product = db.query(Product).filter(Product.id == item['id']).first()
-            if product:
-                product.stock_quantity -= item['quantity']
-        
         db.commit()
+        bump_catalog_version()
         
         st.session_state.cart = []
-        st.success(f"✅ Order #{order.id} placed successfully! Total: ${total:.2f}")
+        st.success(f"✅ Order #{order_id} placed successfully! Total: ${total:.2f}")
         st.balloons()
         
         if st.button("View My Orders"):
             st.session_state.page = 'my_orders'
             st.rerun()
         
+    except OutOfStockError as e:
+        db.rollback()
+        st.error(f"⚠️ {e}. Please update your cart.")
     except Exception as e:
         db.rollback()
         st.error(f"Error placing order: {str(e)}")
@@ -1,6 +1,7 @@
 import streamlit as st
-from database import Order, OrderStatus
-from sqlalchemy import desc
+from sqlalchemy.orm import selectinload
+from database import Order, OrderItem, OrderStatus
+from pagination import paginate, pagination_controls
 
 def show():
     if not st.session_state.user:
@@ -25,12 +26,15 @@ def show():
 def show_orders(db, status_filter=None):
     """Display orders with optional status filter"""
     
-    query = db.query(Order).filter(Order.farmer_id == st.session_state.user.id)
+    query = db.query(Order).filter(Order.farmer_id == st.session_state.user.id).options(
+        selectinload(Order.order_items).joinedload(OrderItem.product)
+    )
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
     
-    orders = query.order_by(desc(Order.created_at)).all()
+    list_key = f"my_orders_{status_filter.value if status_filter else 'all'}"
+    orders = paginate(query, Order, list_key)
     
     if orders:
         for order in orders:
@@ -67,5 +71,7 @@ def show_orders(db, status_filter=None):
                         st.write(f"${item.unit_price:.2f}")
                     with col_total:
                         st.write(f"${item.subtotal:.2f}")
+        
+        pagination_controls(list_key)
     else:
         st.info("No orders found")
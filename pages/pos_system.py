@@ -1,6 +1,8 @@
 import streamlit as st
-from database import Product, Order, OrderItem, OrderStatus, User, UserRole
-from datetime import datetime
+from database import Product, Order, OrderStatus, User, UserRole, session_scope
+from checkout import create_order, OutOfStockError
+from catalog_cache import bump_catalog_version
+from product_search import search as search_products
 
 def show():
     if not st.session_state.user:
@@ -22,15 +24,20 @@ def show():
     with col1:
         st.markdown("### 🔍 Product Search")
         
-        search = st.text_input("Search products", placeholder="Type product name or scan barcode...")
+        search = st.text_input("Search products", placeholder="Type product name or scan barcode...",
+                               key="pos_search", on_change=scan_barcode)
+        
+        scan_message = st.session_state.pop('pos_scan_message', None)
+        if scan_message:
+            level, text = scan_message
+            getattr(st, level)(text)
         
         if search:
-            products = db.query(Product).filter(
+            products = search_products(db.query(Product).filter(
                 Product.agrovet_id == st.session_state.user.id,
                 Product.is_active == True,
-                Product.stock_quantity > 0,
-                Product.name.ilike(f"%{search}%")
-            ).limit(10).all()
+                Product.stock_quantity > 0
+            ), search).limit(10).all()
             
             if products:
                 for product in products:
@@ -136,13 +143,37 @@ def show():
             st.markdown("### 🔢 Quick Keypad")
             st.markdown("Scan barcode or use quick add buttons")
 
-def add_to_pos_cart(product):
-    """Add product to POS cart"""
+def scan_barcode():
+    """Add a scanned product straight to the cart with one exact barcode lookup"""
+    code = st.session_state.pos_search.strip()
+    if not code:
+        return
+    
+    with session_scope() as db:
+        product = db.query(Product).filter(
+            Product.agrovet_id == st.session_state.user.id,
+            Product.barcode == code,
+            Product.is_active == True
+        ).first()
+    
+    # Not a known barcode: leave the text in place for the name search
+    if not product:
+        return
+    
+    if product.stock_quantity <= 0:
+        st.session_state.pos_scan_message = ("warning", f"⚠️ {product.name} is out of stock")
+    else:
+        put_in_pos_cart(product)
+        st.session_state.pos_scan_message = ("success", f"Added {product.name}")
+    st.session_state.pos_search = ""
+
+def put_in_pos_cart(product):
+    """Add one unit of product to the POS cart, merging with an existing line"""
+    st.session_state.setdefault('pos_cart', [])
+    
     for item in st.session_state.pos_cart:
         if item['id'] == product.id:
             item['quantity'] += 1
-            st.success(f"Updated {product.name}")
-            st.rerun()
             return
     
     st.session_state.pos_cart.append({
@@ -151,7 +182,10 @@ def add_to_pos_cart(product):
         'price': product.price,
         'quantity': 1
     })
-    st.success(f"Added {product.name}")
+
+def add_to_pos_cart(product):
+    """Add product to POS cart"""
+    put_in_pos_cart(product)
     st.rerun()
 
 def complete_sale(customer_id, total, payment_method, notes):
@@ -159,34 +193,19 @@ def complete_sale(customer_id, total, payment_method, notes):
     try:
         db = st.session_state.db
         
-        order = Order(
+        order_id = create_order(
+            db,
+            st.session_state.pos_cart,
             farmer_id=customer_id,
             agrovet_id=st.session_state.user.id,
             total_amount=total,
             status=OrderStatus.COMPLETED,
             delivery_address="In-store purchase",
-            notes=f"Payment: {payment_method}. {notes}",
-            created_at=datetime.utcnow()
+            notes=f"Payment: {payment_method}. {notes}"
         )
-        
-        db.add(order)
-        db.flush()
-        
-        for item in st.session_state.pos_cart:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item['id'],
-                quantity=item['quantity'],
-                unit_price=item['price'],
-                subtotal=item['quantity'] * item['price']
-            )
-            db.add(order_item)
-            
-            product = db.query(Product).filter(Product.id == item['id']).first()
-            if product:
-                product.stock_quantity -= item['quantity']
-        
         db.commit()
+        bump_catalog_version()
+        order = db.get(Order, order_id)
         
         st.session_state.pos_cart = []
         st.success(f"✅ Sale completed! Order #{order.id} - Total: ${total:.2f}")
@@ -204,6 +223,9 @@ def complete_sale(customer_id, total, payment_method, notes):
         </div>
         """, unsafe_allow_html=True)
         
+    except OutOfStockError as e:
+        db.rollback()
+        st.error(f"⚠️ {e}")
     except Exception as e:
         db.rollback()
         st.error(f"Error completing sale: {str(e)}")
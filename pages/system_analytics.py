@@ -1,11 +1,21 @@
 import streamlit as st
-from database import User, Product, Order, CommunityPost, DiseaseDetection, OrderStatus, UserRole
+from database import Order, CommunityPost, DiseaseDetection, OrderStatus, UserRole
 from sqlalchemy import func
 from datetime import datetime, timedelta
+from aggregations import time_series, periods_ago
+from dashboard_metrics import admin_summary
+from diagnosis_cache import cache_stats
+from ai_client import ai_client, LATENCY_BUCKETS
+from analytics_engine import snapshot_time, load_lines, revenue_series
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def recent_lines(exported_at, start, end):
+    """Snapshot lines of every agrovet from start to end; exported_at keys the cache to the snapshot"""
+    return load_lines(["status", "subtotal"], start=start, end=end)
+
 def show():
     if not st.session_state.user or st.session_state.user.role != UserRole.ADMIN:
         st.warning("Access denied. Admin privileges required.")
@@ -14,20 +24,23 @@ def show():
     st.markdown('<div class="main-header"><h1>📊 System Analytics</h1><p>Comprehensive platform insights</p></div>', unsafe_allow_html=True)
     
     db = st.session_state.db
+    summary = admin_summary(db)
+    today = datetime.utcnow()
+    
+    # Order charts come from the Parquet snapshot once analytics_snapshot.py has run
+    as_of = snapshot_time()
+    window_start = (today - timedelta(days=29)).date()
+    lines = None
+    if as_of:
+        lines = recent_lines(as_of, window_start, today.date())
+        st.caption(f"Order charts reflect orders up to {as_of.strftime('%Y-%m-%d %H:%M')} UTC")
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### 👥 User Distribution by Role")
         
-        role_counts = {}
-        for role in UserRole:
-            count = db.query(func.count(User.id)).filter(
-                User.role == role,
-                User.is_active == True
-            ).scalar() or 0
-            if count > 0:
-                role_counts[role.value.title()] = count
+        role_counts = summary.role_distribution()
         
         if role_counts:
             fig = go.Figure(data=[go.Pie(labels=list(role_counts.keys()), values=list(role_counts.values()),
@@ -40,11 +53,7 @@ def show():
     with col2:
         st.markdown("### 📦 Order Status Distribution")
         
-        status_counts = {}
-        for status in OrderStatus:
-            count = db.query(func.count(Order.id)).filter(Order.status == status).scalar() or 0
-            if count > 0:
-                status_counts[status.value.title()] = count
+        status_counts = summary.orders.distribution()
         
         if status_counts:
             fig = go.Figure(data=[go.Pie(labels=list(status_counts.keys()), values=list(status_counts.values()))])
@@ -57,18 +66,17 @@ def show():
     
     st.markdown("### 💰 Revenue Analysis (Last 30 Days)")
     
-    daily_revenue = []
-    dates = []
+    if lines is not None:
+        daily_series = revenue_series(lines, window_start, today.date(), "day")
+    else:
+        daily_series = time_series(
+            db, func.sum(Order.total_amount), Order.created_at,
+            today - timedelta(days=29), today, "day",
+            filters=[Order.status == OrderStatus.COMPLETED]
+        )
     
-    for i in range(29, -1, -1):
-        date = datetime.utcnow() - timedelta(days=i)
-        revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.status == OrderStatus.COMPLETED,
-            func.date(Order.created_at) == date.date()
-        ).scalar() or 0
-        
-        dates.append(date.strftime('%m/%d'))
-        daily_revenue.append(float(revenue))
+    dates = [day.strftime('%m/%d') for day, _ in daily_series]
+    daily_revenue = [float(revenue) for _, revenue in daily_series]
     
     df = pd.DataFrame({'Date': dates, 'Revenue': daily_revenue})
     fig = px.area(df, x='Date', y='Revenue', title="Daily Revenue Trend")
@@ -82,17 +90,13 @@ def show():
     with col1:
         st.markdown("### 🌱 Disease Detection Activity")
         
-        detection_counts = []
-        dates = []
+        detection_series = time_series(
+            db, func.count(DiseaseDetection.id), DiseaseDetection.created_at,
+            today - timedelta(days=6), today, "day"
+        )
         
-        for i in range(6, -1, -1):
-            date = datetime.utcnow() - timedelta(days=i)
-            count = db.query(func.count(DiseaseDetection.id)).filter(
-                func.date(DiseaseDetection.created_at) == date.date()
-            ).scalar() or 0
-            
-            dates.append(date.strftime('%a'))
-            detection_counts.append(count)
+        dates = [day.strftime('%a') for day, _ in detection_series]
+        detection_counts = [count for _, count in detection_series]
         
         fig = go.Figure(data=[go.Bar(x=dates, y=detection_counts, marker_color='#16a34a')])
         fig.update_layout(xaxis_title="Day", yaxis_title="Scans", height=300)
@@ -101,20 +105,13 @@ def show():
     with col2:
         st.markdown("### 💬 Community Engagement")
         
-        posts_per_week = []
-        weeks = []
+        post_series = time_series(
+            db, func.count(CommunityPost.id), CommunityPost.created_at,
+            periods_ago(today, 4, "week"), today, "week"
+        )
         
-        for i in range(3, -1, -1):
-            week_start = datetime.utcnow() - timedelta(weeks=i)
-            week_end = week_start + timedelta(days=7)
-            
-            count = db.query(func.count(CommunityPost.id)).filter(
-                CommunityPost.created_at >= week_start,
-                CommunityPost.created_at < week_end
-            ).scalar() or 0
-            
-            weeks.append(f"Week {4-i}")
-            posts_per_week.append(count)
+        weeks = [f"Week of {week.strftime('%m/%d')}" for week, _ in post_series]
+        posts_per_week = [count for _, count in post_series]
         
         fig = go.Figure(data=[go.Bar(x=weeks, y=posts_per_week, marker_color='#3b82f6')])
         fig.update_layout(xaxis_title="Week", yaxis_title="Posts", height=300)
@@ -127,20 +124,79 @@ def show():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        today_users = db.query(func.count(User.id)).filter(
-            func.date(User.created_at) == datetime.utcnow().date()
-        ).scalar() or 0
-        st.metric("New Users Today", today_users)
+        st.metric("New Users Today", summary.new_users_today)
     
     with col2:
-        today_orders = db.query(func.count(Order.id)).filter(
-            func.date(Order.created_at) == datetime.utcnow().date()
-        ).scalar() or 0
-        st.metric("Orders Today", today_orders)
+        st.metric("Orders Today", summary.orders.recent)
     
     with col3:
-        today_revenue = db.query(func.sum(Order.total_amount)).filter(
-            Order.status == OrderStatus.COMPLETED,
-            func.date(Order.created_at) == datetime.utcnow().date()
-        ).scalar() or 0
+        today_revenue = summary.orders[OrderStatus.COMPLETED].recent_amount
         st.metric("Revenue Today", f"${today_revenue:.2f}")
+    
+    st.markdown("---")
+    
+    st.markdown("### 🧠 Diagnosis Cache")
+    
+    cache = cache_stats()
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Cached Diagnoses", cache.entries)
+    
+    with col2:
+        st.metric("AI Calls Saved", cache.stored_hits)
+    
+    with col3:
+        st.metric("Hit Rate (this server)", f"{cache.hit_rate:.0%}", help=f"{cache.hits} of {cache.lookups} scans since the server started")
+    
+    st.markdown("---")
+    
+    show_ai_service()
+
+def show_ai_service():
+    """AI provider health and latency on this server since it started"""
+    st.markdown("### 🤖 AI Service")
+    
+    stats = ai_client.stats()
+    breaker_label = {"closed": "🟢 Healthy", "half-open": "🟡 Recovering", "open": "🔴 Failing fast"}
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Status", breaker_label[stats.breaker_state])
+    
+    with col2:
+        st.metric("AI Calls", stats.calls)
+    
+    with col3:
+        st.metric("Retries", stats.retries)
+    
+    with col4:
+        st.metric("Rejected (breaker open)", stats.rejected)
+    
+    if stats.hedges:
+        st.caption(f"Hedged requests: {stats.hedges} sent, {stats.hedge_wins} answered first")
+    
+    if not stats.latencies:
+        st.info("No AI requests since the server started")
+        return
+    
+    rows = []
+    for (operation, outcome), histogram in sorted(stats.latencies.items()):
+        rows.append({
+            "Operation": operation,
+            "Outcome": outcome,
+            "Requests": histogram.count,
+            "Mean (s)": round(histogram.mean, 2),
+            "p50 ≤ (s)": histogram.quantile(0.5),
+            "p95 ≤ (s)": histogram.quantile(0.95),
+            "p99 ≤ (s)": histogram.quantile(0.99),
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    
+    labels = [f"≤{bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+    fig = go.Figure([
+        go.Bar(x=labels, y=histogram.counts, name=f"{operation} ({outcome})")
+        for (operation, outcome), histogram in sorted(stats.latencies.items())
+    ])
+    fig.update_layout(title="Request Latency", barmode="stack", height=300, xaxis_title="Latency", yaxis_title="Requests")
+    st.plotly_chart(fig, use_container_width=True)
@@ -1,7 +1,7 @@
 import streamlit as st
 from database import User, UserRole
 from auth import create_user
-from sqlalchemy import desc
+from pagination import paginate, pagination_controls
 
 def show():
     if not st.session_state.user or st.session_state.user.role != UserRole.ADMIN:
@@ -53,7 +53,8 @@ def show_users(db):
     elif status_filter == "Inactive":
         query = query.filter(User.is_active == False)
     
-    users = query.order_by(desc(User.created_at)).all()
+    list_key = "users"
+    users = paginate(query, User, list_key, filters=(search, role_filter, status_filter))
     
     if users:
         for user in users:
@@ -93,6 +94,8 @@ def show_users(db):
                         db.commit()
                         st.success("User deleted!")
                         st.rerun()
+        
+        pagination_controls(list_key)
     else:
         st.info("No users found")
 
@@ -0,0 +1,102 @@
+"""
+Keyset (seek) pagination for list pages
+
+Lists are ordered newest first by (created_at, id) and each page is fetched
+with a WHERE on the last row already shown instead of OFFSET, so a page costs
+the same however large the table is or however far the user has paged.
+"""
+import streamlit as st
+from sqlalchemy import and_, or_
+from sqlalchemy.engine import Row
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+def keyset_page(query, model, page_size, after=None):
+    """
+    Fetch one page of query ordered by (created_at, id) descending
+
+    `after` is the (created_at, id) cursor of the last row of the previous
+    page. Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if after is not None:
+        created_at, row_id = after
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1][0] if isinstance(rows[-1], Row) else rows[-1]
+        next_cursor = (last.created_at, last.id)
+    return rows, next_cursor
+
+def _pager(key):
+    return st.session_state.setdefault(f"{key}_pager", {"cursors": [None], "next": None})
+
+def _reset_pager(key):
+    _pager(key)["cursors"] = [None]
+
+def paginate(query, model, key, default_page_size=25, filters=None):
+    """
+    Render a page-size selector and return the current page of query
+
+    `key` must be unique per list. Pass the active filters as `filters` (any
+    value that compares equal when they are unchanged): when they change the
+    list starts again from the first page. Free text such as a search box
+    must go there rather than into the key, or every search would leave
+    another pager behind in the session. Call pagination_controls(key) after
+    rendering the rows.
+    """
+    return paginate_with(
+        lambda page_size, after: keyset_page(query, model, page_size, after),
+        key,
+        default_page_size,
+        filters
+    )
+
+def paginate_with(fetch_page, key, default_page_size=25, filters=None):
+    """
+    Like paginate(), but pages come from fetch_page(page_size, after)
+
+    fetch_page must return (rows, next_cursor) like keyset_page(), e.g. from
+    a cache in front of it.
+    """
+    pager = _pager(key)
+    if pager.get("filters") != filters:
+        pager["filters"] = filters
+        pager["cursors"] = [None]
+
+    page_size = st.selectbox(
+        "Rows per page",
+        PAGE_SIZES,
+        index=PAGE_SIZES.index(default_page_size),
+        key=f"{key}_page_size",
+        on_change=_reset_pager,
+        args=(key,)
+    )
+
+    rows, pager["next"] = fetch_page(page_size, pager["cursors"][-1])
+    return rows
+
+def pagination_controls(key):
+    """Render newer/older navigation for a list fetched with paginate()"""
+    pager = _pager(key)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+
+    with col_prev:
+        if len(pager["cursors"]) > 1 and st.button("⬅️ Newer", key=f"{key}_prev", use_container_width=True):
+            pager["cursors"].pop()
+            st.rerun()
+
+    with col_page:
+        st.caption(f"Page {len(pager['cursors'])}")
+
+    with col_next:
+        if pager["next"] and st.button("Older ➡️", key=f"{key}_next", use_container_width=True):
+            pager["cursors"].append(pager["next"])
+            st.rerun()
@@ -0,0 +1,114 @@
+"""
+Full-text product search
+
+SQLite uses an FTS5 external-content table (products_fts) kept in sync with
+products by triggers; Postgres uses a generated, GIN-indexed tsvector column
+(products.search_vector). Both rank matches over name, category,
+manufacturer and description and treat every search word as a prefix, so
+results come from the index instead of a leading-wildcard table scan.
+"""
+import re
+from sqlalchemy import func, inspect, or_, text, table, column, literal_column
+from sqlalchemy.exc import OperationalError
+from database import Product
+
+SEARCH_COLUMNS = ("name", "description", "category", "manufacturer")
+RESULT_LIMIT = 50
+
+_index_available = {}
+
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category, manufacturer,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category, manufacturer)
+        VALUES (new.id, new.name, new.description, new.category, new.manufacturer);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category, manufacturer)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.manufacturer);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, category, manufacturer ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category, manufacturer)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.manufacturer);
+        INSERT INTO products_fts(rowid, name, description, category, manufacturer)
+        VALUES (new.id, new.name, new.description, new.category, new.manufacturer);
+    END""",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_SETUP = [
+    """ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(manufacturer, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+def create_search_index(conn):
+    """Create the full-text index and its sync mechanism for the connected database"""
+    if conn.dialect.name == "postgresql":
+        statements = POSTGRES_SETUP
+    elif conn.dialect.name == "sqlite":
+        statements = SQLITE_SETUP
+    else:
+        return
+
+    try:
+        for statement in statements:
+            conn.execute(text(statement))
+    except OperationalError as e:
+        # SQLite builds without FTS5 keep working through the ILIKE fallback
+        print(f"Warning: full-text search index not created ({e.orig}). Falling back to ILIKE search.")
+
+def search_terms(term):
+    """Lower-cased word tokens of a search string"""
+    return re.findall(r"\w+", (term or "").lower())
+
+def has_search_index(bind):
+    """Whether the full-text index exists in this database (checked once per engine)"""
+    key = str(bind.url)
+    if key not in _index_available:
+        inspector = inspect(bind)
+        if bind.dialect.name == "postgresql":
+            columns = [c["name"] for c in inspector.get_columns("products")]
+            _index_available[key] = "search_vector" in columns
+        elif bind.dialect.name == "sqlite":
+            _index_available[key] = inspector.has_table("products_fts")
+        else:
+            _index_available[key] = False
+    return _index_available[key]
+
+def search(query, term):
+    """Restrict a Product query to full-text matches for term, best matches first"""
+    tokens = search_terms(term)
+    if not tokens:
+        return query
+
+    bind = query.session.get_bind()
+    if not has_search_index(bind):
+        pattern = f"%{term}%"
+        return query.filter(or_(*[getattr(Product, name).ilike(pattern) for name in SEARCH_COLUMNS]))
+
+    if bind.dialect.name == "postgresql":
+        vector = literal_column("products.search_vector")
+        tsquery = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        return query.filter(vector.op("@@")(tsquery)).order_by(func.ts_rank(vector, tsquery).desc())
+
+    fts = table("products_fts", column("rowid"))
+    fts_ref = literal_column("products_fts")
+    match = " ".join(f'"{token}"*' for token in tokens)
+    # bm25 weights follow the column order: name, description, category, manufacturer
+    return query.join(fts, fts.c.rowid == Product.id).filter(
+        fts_ref.op("MATCH")(match)
+    ).order_by(func.bm25(fts_ref, 10.0, 1.0, 5.0, 5.0))
+
+def search_product_ids(db, term, limit=RESULT_LIMIT):
+    """Ids of the best `limit` products matching term"""
+    return [product_id for (product_id,) in search(db.query(Product.id), term).limit(limit)]
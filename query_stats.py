@@ -0,0 +1,183 @@
+"""
+Query counting and per-rerun query instrumentation
+
+instrument_engine() hooks the engine's cursor events so every statement is
+timed. Inside track_rerun() (wrapped around each page render in app.py) the
+statements are collected for that rerun and tagged with the page; at the end
+of the rerun slow statements and pages over their budget are written to a
+rotating log.
+
+count_queries() and assert_max_queries() count the statements sent by a
+block so an N+1 regression (usually a relationship that lost its eager load)
+fails loudly.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", "slow_queries.log")
+
+# (max statements, max total DB milliseconds) per rerun of a page
+DEFAULT_BUDGET = (40, 500)
+PAGE_BUDGETS = {
+    "home": (5, 100),
+    "login": (5, 100),
+    "register": (5, 100),
+    "pos_system": (20, 300),
+    "marketplace": (20, 300),
+    "inventory": (20, 300),
+    "my_orders": (10, 300),
+    "agrovet_orders": (20, 400),
+    "all_orders": (20, 400),
+    "community": (10, 300),
+}
+
+TOP_STATEMENTS = 5
+
+_current = threading.local()
+_logger = None
+
+class RerunStats:
+    """Statements executed during one rerun of a page"""
+
+    def __init__(self, page):
+        self.page = page
+        self.timings = []
+
+    @property
+    def count(self):
+        return len(self.timings)
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, ms in self.timings)
+
+    @property
+    def budget(self):
+        return PAGE_BUDGETS.get(self.page, DEFAULT_BUDGET)
+
+    @property
+    def over_budget(self):
+        max_queries, max_ms = self.budget
+        return self.count > max_queries or self.total_ms > max_ms
+
+    def slowest(self, n=TOP_STATEMENTS):
+        """The n slowest (statement, milliseconds), slowest first"""
+        return sorted(self.timings, key=lambda t: t[1], reverse=True)[:n]
+
+def get_logger():
+    """Logger writing to the rotating slow-query log (created on first use)"""
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("adiseware.queries")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=5 * 1024 * 1024, backupCount=3)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time, and a failed statement's
+    # start time is simply overwritten by the next one
+    conn.info["query_start_time"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_start_time", None)
+    stats = getattr(_current, "stats", None)
+    if started is not None and stats is not None:
+        stats.timings.append((statement, (time.perf_counter() - started) * 1000))
+
+def instrument_engine(engine):
+    """Time every statement sent through engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def _one_line(statement):
+    return " ".join(statement.split())
+
+def report(stats):
+    """Log slow statements and budget overruns of a finished rerun"""
+    slow = [(s, ms) for s, ms in stats.slowest(stats.count) if ms >= SLOW_QUERY_MS]
+    if not slow and not stats.over_budget:
+        return
+
+    logger = get_logger()
+    if stats.over_budget:
+        max_queries, max_ms = stats.budget
+        logger.warning(
+            f"page={stats.page} over budget: {stats.count} queries (max {max_queries}), "
+            f"{stats.total_ms:.1f} ms (max {max_ms})"
+        )
+    for statement, ms in slow:
+        logger.info(f"page={stats.page} slow query {ms:.1f} ms: {_one_line(statement)}")
+
+@contextmanager
+def track_rerun(page):
+    """Collect the statements executed in this thread during the block, tagged with page"""
+    stats = RerunStats(page)
+    _current.stats = stats
+    try:
+        yield stats
+    finally:
+        _current.stats = None
+        try:
+            report(stats)
+        except OSError as e:
+            print(f"Warning: could not write slow query log ({e})")
+
+class QueryCounter:
+    """Collects the SQL statements executed while it is listening, and their total time"""
+
+    def __init__(self):
+        self.statements = []
+        self.total_ms = 0.0
+        self._started = None
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self._started = time.perf_counter()
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        if self._started is not None:
+            self.total_ms += (time.perf_counter() - self._started) * 1000
+            self._started = None
+
+def _engine(bind):
+    if isinstance(bind, Session):
+        bind = bind.get_bind()
+    return getattr(bind, "engine", bind)
+
+@contextmanager
+def count_queries(bind):
+    """Count statements sent through an engine, connection or session inside the block"""
+    engine = _engine(bind)
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter.before)
+    event.listen(engine, "after_cursor_execute", counter.after)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter.before)
+        event.remove(engine, "after_cursor_execute", counter.after)
+
+@contextmanager
+def assert_max_queries(bind, limit):
+    """Raise AssertionError if the block sends more than `limit` statements"""
+    with count_queries(bind) as counter:
+        yield counter
+
+    if counter.count > limit:
+        listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{listing}")
@@ -0,0 +1,131 @@
+"""
+Daily sales rollup maintenance
+
+daily_sales holds revenue and units sold of completed orders per
+(agrovet, day, category, product). Checkout and order status updates adjust it
+in the same transaction as the order itself, so analytics read a handful of
+rows per day no matter how many years of orders a shop has.
+
+Rebuild from existing orders with: python sales_rollup.py --backfill
+"""
+import sys
+from collections import defaultdict
+from sqlalchemy import func, cast, delete, insert, select, Date
+from database import DailySales, Order, OrderItem, OrderStatus, Product
+
+ROLLUP_KEY = ("agrovet_id", "day", "category", "product_id")
+
+def _upsert_statement(dialect_name):
+    """INSERT ... ON CONFLICT that adds the new deltas to an existing rollup row"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"Sales rollup is not supported for {dialect_name}")
+
+    table = DailySales.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "revenue": table.c.revenue + stmt.excluded.revenue,
+            "units_sold": table.c.units_sold + stmt.excluded.units_sold,
+        }
+    )
+
+def line_category():
+    """
+    Rollup category of an order line: the category it was sold under, so that
+    reversing an order hits the rows it added even if the product was
+    recategorized since (lines predating the snapshot fall back to the product)
+    """
+    return func.coalesce(OrderItem.category, Product.category, "")
+
+def apply_order(db, order, sign=1):
+    """Add (sign=1) or remove (sign=-1) an order's lines from daily_sales"""
+    db.flush()
+
+    lines = db.query(
+        Product.agrovet_id,
+        line_category().label("category"),
+        OrderItem.product_id,
+        OrderItem.quantity,
+        OrderItem.subtotal
+    ).join(Product, OrderItem.product_id == Product.id).filter(
+        OrderItem.order_id == order.id,
+        Product.agrovet_id.isnot(None)
+    ).all()
+
+    day = (order.created_at or order.updated_at).date()
+    totals = defaultdict(lambda: {"revenue": 0.0, "units_sold": 0})
+    for line in lines:
+        key = (line.agrovet_id, day, line.category, line.product_id)
+        totals[key]["revenue"] += line.subtotal
+        totals[key]["units_sold"] += line.quantity
+
+    if not totals:
+        return
+
+    rows = [
+        {
+            **dict(zip(ROLLUP_KEY, key)),
+            "revenue": sign * values["revenue"],
+            "units_sold": sign * values["units_sold"],
+        }
+        for key, values in totals.items()
+    ]
+    db.execute(_upsert_statement(db.get_bind().dialect.name), rows)
+
+def record_status_change(db, order, previous_status):
+    """Keep daily_sales in step when an order enters or leaves COMPLETED (previous_status is None for new orders)"""
+    was_completed = previous_status == OrderStatus.COMPLETED
+    is_completed = order.status == OrderStatus.COMPLETED
+
+    if is_completed and not was_completed:
+        apply_order(db, order, 1)
+    elif was_completed and not is_completed:
+        apply_order(db, order, -1)
+
+def backfill(conn):
+    """Rebuild daily_sales from all completed orders with a single INSERT ... SELECT"""
+    if conn.dialect.name == "sqlite":
+        day = func.date(Order.created_at)
+    else:
+        day = cast(Order.created_at, Date)
+
+    category = line_category()
+    source = select(
+        Product.agrovet_id,
+        day,
+        category,
+        OrderItem.product_id,
+        func.sum(OrderItem.subtotal),
+        func.sum(OrderItem.quantity)
+    ).select_from(OrderItem).join(
+        Order, OrderItem.order_id == Order.id
+    ).join(
+        Product, OrderItem.product_id == Product.id
+    ).where(
+        Order.status == OrderStatus.COMPLETED,
+        Product.agrovet_id.isnot(None)
+    ).group_by(Product.agrovet_id, day, category, OrderItem.product_id)
+
+    conn.execute(delete(DailySales))
+    conn.execute(insert(DailySales).from_select(
+        list(ROLLUP_KEY) + ["revenue", "units_sold"],
+        source
+    ))
+
+if __name__ == "__main__":
+    from database import engine, init_db
+
+    if "--backfill" not in sys.argv:
+        print("Usage: python sales_rollup.py --backfill")
+        sys.exit(1)
+
+    init_db()
+    with engine.begin() as conn:
+        backfill(conn)
+        rows = conn.execute(select(func.count()).select_from(DailySales)).scalar()
+    print(f"✅ Rebuilt daily_sales rollup ({rows} rows)")
@@ -66,6 +66,7 @@ def seed_database():
             price=25.99,
             stock_quantity=100,
             manufacturer="GreenGrow",
+            barcode="6001234500011",
             agrovet_id=demo_agrovet.id,
             is_active=True
         ),
@@ -76,6 +77,7 @@ def seed_database():
             price=15.50,
             stock_quantity=75,
             manufacturer="CropCare",
+            barcode="6001234500028",
             agrovet_id=demo_agrovet.id,
             is_active=True
         ),
@@ -86,6 +88,7 @@ def seed_database():
             price=8.99,
             stock_quantity=200,
             manufacturer="SeedMaster",
+            barcode="6001234500035",
             agrovet_id=demo_agrovet.id,
             is_active=True
         ),
@@ -96,6 +99,7 @@ def seed_database():
             price=22.00,
             stock_quantity=50,
             manufacturer="PlantHealth",
+            barcode="6001234500042",
             agrovet_id=demo_agrovet.id,
             is_active=True
         ),
@@ -106,6 +110,7 @@ def seed_database():
             price=18.50,
             stock_quantity=30,
             manufacturer="FarmTools Inc",
+            barcode="6001234500059",
             agrovet_id=demo_agrovet.id,
             is_active=True
         )
@@ -0,0 +1,22 @@
+"""
+Point the app at a throwaway database, blob store and logs
+
+Settings are read from the environment when modules are first imported, so
+this runs before any test imports application code.
+"""
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="adiseware-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ["BLOB_STORE_DIR"] = os.path.join(_scratch, "blob_store")
+os.environ["ANALYTICS_SNAPSHOT_DIR"] = os.path.join(_scratch, "analytics_snapshot")
+os.environ["SLOW_QUERY_LOG"] = os.path.join(_scratch, "slow_queries.log")
+os.environ.pop("OPENAI_API_KEY", None)
+
+import pytest
+from database import init_db
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import ai_client
+from ai_client import AIClient, AIServiceError, AIUnavailableError, CircuitBreaker
+
+def completion(content):
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+class StubServer:
+    """
+    OpenAI-compatible chat completions endpoint answering from a script
+
+    Each request takes the next (status, body, headers, delay) reply; once the
+    script runs out the last reply repeats. Requests are counted as they arrive.
+    """
+
+    def __init__(self):
+        self.replies = deque()
+        self.requests = 0
+        self._last = (200, completion("ok"), {}, 0)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("content-length", 0)))
+                status, body, headers, delay = stub._next()
+                time.sleep(delay)
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(payload)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass  # the client gave up on this request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def _next(self):
+        with self._lock:
+            self.requests += 1
+            if self.replies:
+                self._last = self.replies.popleft()
+            return self._last
+
+    def reply(self, status=200, body=None, headers=None, delay=0):
+        self.replies.append((status, completion("ok") if body is None else body, headers or {}, delay))
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    thread = threading.Thread(target=server.server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+@pytest.fixture(autouse=True)
+def quick_backoff(monkeypatch):
+    monkeypatch.setattr(ai_client, "BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(ai_client, "BACKOFF_MAX", 1.0)
+
+def client(stub, **options):
+    options.setdefault("breaker", CircuitBreaker(threshold=100, cooldown=60))
+    return AIClient(api_key="test", base_url=stub.url, **options)
+
+def chat(ai, **options):
+    response = ai.chat("test", model="stub", messages=[{"role": "user", "content": "hi"}], **options)
+    return response.choices[0].message.content
+
+def test_retries_429_and_5xx_then_succeeds(stub):
+    stub.reply(429)
+    stub.reply(503)
+    stub.reply(500)
+    stub.reply(body=completion("healthy"))
+    ai = client(stub, max_retries=3)
+
+    assert chat(ai) == "healthy"
+    assert stub.requests == 4
+    assert ai.stats().retries == 3
+
+def test_honours_retry_after(stub):
+    stub.reply(429, headers={"retry-after": "0.5"})
+    stub.reply()
+    ai = client(stub, max_retries=1)
+
+    started = time.monotonic()
+    assert chat(ai) == "ok"
+    assert time.monotonic() - started >= 0.5
+    assert stub.requests == 2
+
+def test_client_errors_are_not_retried(stub):
+    stub.reply(400, body={"error": {"message": "bad request"}})
+    ai = client(stub, max_retries=3)
+
+    with pytest.raises(AIServiceError, match="HTTP 400"):
+        chat(ai)
+    assert stub.requests == 1
+
+def test_gives_up_at_the_deadline_on_a_slow_provider(stub):
+    stub.reply(delay=3)
+    ai = client(stub, max_retries=3, deadline=0.5)
+
+    started = time.monotonic()
+    with pytest.raises(AIServiceError, match="timed out"):
+        chat(ai)
+    assert time.monotonic() - started < 2
+
+def test_does_not_wait_past_the_deadline_for_a_retry(stub):
+    stub.reply(503, headers={"retry-after": "1"})
+    ai = client(stub, max_retries=3, deadline=0.5)
+
+    started = time.monotonic()
+    with pytest.raises(AIServiceError, match="HTTP 503"):
+        chat(ai)
+    assert time.monotonic() - started < 0.5
+    assert stub.requests == 1
+
+def test_circuit_breaker_opens_half_opens_and_closes(stub):
+    breaker = CircuitBreaker(threshold=2, cooldown=0.3)
+    ai = client(stub, max_retries=0, breaker=breaker)
+    stub.reply(500)
+    stub.reply(500)
+    stub.reply(body=completion("recovered"))
+
+    for _ in range(2):
+        with pytest.raises(AIServiceError, match="HTTP 500"):
+            chat(ai)
+    assert breaker.state == "open"
+
+    with pytest.raises(AIUnavailableError):
+        chat(ai)
+    assert stub.requests == 2
+    assert ai.stats().rejected == 1
+
+    time.sleep(0.3)
+    assert breaker.state == "half-open"
+    assert chat(ai) == "recovered"
+    assert breaker.state == "closed"
+
+def test_failed_trial_reopens_the_breaker(stub):
+    breaker = CircuitBreaker(threshold=1, cooldown=0.2)
+    ai = client(stub, max_retries=0, breaker=breaker)
+    stub.reply(500)
+    stub.reply(500)
+    stub.reply()
+
+    with pytest.raises(AIServiceError):
+        chat(ai)
+    time.sleep(0.2)
+    with pytest.raises(AIServiceError, match="HTTP 500"):
+        chat(ai)
+    assert breaker.state == "open"
+
+    time.sleep(0.2)
+    assert chat(ai) == "ok"
+    assert breaker.state == "closed"
+
+def test_hedged_request_returns_the_faster_response(stub):
+    stub.reply(body=completion("slow"), delay=1.5)
+    stub.reply(body=completion("fast"))
+    ai = client(stub, max_retries=0, hedge_after=0.2)
+
+    started = time.monotonic()
+    assert chat(ai) == "fast"
+    assert time.monotonic() - started < 1
+    stats = ai.stats()
+    assert (stats.hedges, stats.hedge_wins) == (1, 1)
+
+def test_undecodable_trial_response_does_not_wedge_the_breaker(stub):
+    breaker = CircuitBreaker(threshold=1, cooldown=0.2)
+    ai = client(stub, max_retries=0, breaker=breaker)
+    stub.reply(500)
+    stub.reply(body=b"not json")
+    stub.reply()
+
+    with pytest.raises(AIServiceError):
+        chat(ai)
+    time.sleep(0.2)
+    with pytest.raises(AIServiceError, match="unexpected response"):
+        chat(ai)
+    assert breaker.state == "open"
+
+    time.sleep(0.2)
+    assert chat(ai) == "ok"
+    assert breaker.state == "closed"
@@ -0,0 +1,104 @@
+import itertools
+import threading
+import pytest
+from checkout import OutOfStockError, create_order
+from database import Order, OrderItem, OrderStatus, Product, SessionLocal, User, UserRole
+
+_accounts = itertools.count()
+
+@pytest.fixture
+def shop():
+    """An agrovet and a farmer, with a function to stock products"""
+    db = SessionLocal()
+    users = {}
+    for role in (UserRole.AGROVET, UserRole.FARMER):
+        name = f"checkout_{role.value}_{next(_accounts)}"
+        users[role] = User(username=name, email=f"{name}@example.com", password_hash="x",
+                           full_name=name.title(), role=role)
+        db.add(users[role])
+    db.commit()
+
+    def stock(name, quantity, price=10.0):
+        product = Product(agrovet_id=users[UserRole.AGROVET].id, name=name, category="Seeds",
+                          price=price, stock_quantity=quantity, is_active=True)
+        db.add(product)
+        db.commit()
+        return product
+
+    yield users[UserRole.FARMER], stock
+    db.close()
+
+def checkout(farmer, lines):
+    """Check out lines in a session of its own, as one page rerun would"""
+    db = SessionLocal()
+    try:
+        order_id = create_order(
+            db, lines, farmer_id=farmer.id, status=OrderStatus.PENDING,
+            total_amount=sum(line["quantity"] * line["price"] for line in lines),
+            delivery_address="Plot 7",
+        )
+        db.commit()
+        return order_id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def test_concurrent_checkouts_never_oversell(shop):
+    farmer, stock = shop
+    product = stock("Last Bags of Maize Seed", 5)
+    buyers = 12
+    start = threading.Barrier(buyers)
+    outcomes = []
+    lock = threading.Lock()
+
+    def buy():
+        start.wait()
+        try:
+            checkout(farmer, [{"id": product.id, "price": product.price, "quantity": 1}])
+            outcome = "sold"
+        except OutOfStockError:
+            outcome = "out of stock"
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=buy) for _ in range(buyers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == buyers
+    assert outcomes.count("sold") == 5, outcomes
+    assert outcomes.count("out of stock") == buyers - 5, outcomes
+    db = SessionLocal()
+    try:
+        assert db.get(Product, product.id).stock_quantity == 0
+        assert db.query(OrderItem).filter(OrderItem.product_id == product.id).count() == 5
+    finally:
+        db.close()
+
+def test_short_line_rolls_back_the_whole_basket(shop):
+    farmer, stock = shop
+    plenty = stock("Fertilizer", 10)
+    scarce = stock("Sprayer", 1, price=45.0)
+    lines = [
+        {"id": plenty.id, "price": plenty.price, "quantity": 3},
+        {"id": scarce.id, "price": scarce.price, "quantity": 2},
+    ]
+
+    with pytest.raises(OutOfStockError) as error:
+        checkout(farmer, lines)
+
+    assert error.value.shortages == [("Sprayer", 1)]
+    db = SessionLocal()
+    try:
+        assert db.get(Product, plenty.id).stock_quantity == 10
+        assert db.get(Product, scarce.id).stock_quantity == 1
+        assert db.query(Order).filter(Order.farmer_id == farmer.id).count() == 0
+        assert db.query(OrderItem).filter(OrderItem.product_id.in_([plenty.id, scarce.id])).count() == 0
+    finally:
+        db.close()
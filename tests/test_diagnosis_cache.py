@@ -0,0 +1,24 @@
+from io import BytesIO
+import pytest
+from PIL import Image
+from diagnosis_cache import diagnose, is_cacheable
+
+@pytest.mark.parametrize("result, expected", [
+    ({"disease_name": "Rust", "confidence": 0.9}, True),
+    ({"disease_name": "Rust", "confidence": "0.85"}, True),
+    ({"disease_name": "Rust", "confidence": "high"}, False),
+    ({"disease_name": "Rust", "confidence": None}, False),
+    ({"disease_name": "Rust"}, False),
+    ({"error": "timed out", "confidence": 0}, False),
+])
+def test_is_cacheable(result, expected):
+    assert is_cacheable(result) is expected
+
+def test_diagnose_accepts_non_numeric_confidence():
+    image = BytesIO()
+    Image.linear_gradient("L").resize((400, 300)).save(image, "JPEG")
+
+    result, distance = diagnose(image.getvalue(), lambda image_bytes: {"disease_name": "Blight", "confidence": None})
+
+    assert result["disease_name"] == "Blight"
+    assert distance is None
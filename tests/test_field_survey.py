@@ -0,0 +1,92 @@
+import os
+import threading
+from io import BytesIO
+import numpy as np
+import pytest
+from PIL import Image
+from blob_store import BLOB_STORE_DIR, path
+from database import DiseaseDetection, SessionLocal, User, UserRole
+from field_survey import RateLimiter, SurveyResult, analyze_survey, save_survey
+
+def photo(seed):
+    """A distinct photo-like JPEG: smooth colour blobs, so perceptual hashes differ per seed"""
+    rng = np.random.default_rng(seed)
+    small = (rng.random((6, 8, 3)) * 255).astype("uint8")
+    output = BytesIO()
+    Image.fromarray(small).resize((800, 600), Image.Resampling.BICUBIC).save(output, "JPEG")
+    return output.getvalue()
+
+def test_duplicate_photos_are_analyzed_once_and_all_saved():
+    originals = [photo(seed) for seed in (101, 102, 103, 104)]
+    files = [(f"leaf_{i}.jpg", originals[i % 4]) for i in range(12)]
+
+    calls = []
+    lock = threading.Lock()
+
+    def analyze(image_bytes):
+        with lock:
+            calls.append(image_bytes)
+        return {"plant_type": "Maize", "disease_name": "Rust", "confidence": 0.9, "severity": "Low"}
+
+    results = list(analyze_survey(files, workers=6, analyze=analyze, limiter=RateLimiter(100)))
+
+    assert sorted(r.name for r in results) == sorted(name for name, _ in files)
+    assert all(r.ok for r in results), [r.error for r in results if not r.ok]
+    assert len(calls) == 4
+    assert sum(not r.cached for r in results) == 4
+    assert len({r.image_ref for r in results}) == 4
+    assert all(os.path.exists(path(r.image_ref, "thumb")) for r in results)
+    leftovers = [f for _, _, names in os.walk(BLOB_STORE_DIR) for f in names if f.endswith(".tmp")]
+    assert leftovers == []
+
+    db = SessionLocal()
+    try:
+        farmer = User(username="survey_farmer", email="survey@example.com", password_hash="x",
+                      full_name="Survey Farmer", role=UserRole.FARMER)
+        db.add(farmer)
+        db.commit()
+        assert save_survey(db, farmer.id, results) == 12
+        db.commit()
+        assert db.query(DiseaseDetection).filter(DiseaseDetection.user_id == farmer.id).count() == 12
+    finally:
+        db.close()
+
+def test_unreadable_photo_fails_without_stopping_the_survey():
+    files = [("good.jpg", photo(201)), ("broken.jpg", b"not an image")]
+    results = {r.name: r for r in analyze_survey(
+        files, analyze=lambda image_bytes: {"disease_name": "Healthy", "confidence": 0.8}, limiter=RateLimiter(100)
+    )}
+
+    assert results["good.jpg"].ok
+    assert not results["broken.jpg"].ok
+    assert "Could not read image" in results["broken.jpg"].error
+
+ODD_CONFIDENCES = [
+    SurveyResult("null.jpg", {"disease_name": "Rust", "confidence": None}, None),
+    SurveyResult("string.jpg", {"disease_name": "Rust", "confidence": "0.85"}, None),
+    SurveyResult("words.jpg", {"disease_name": "Rust", "confidence": "high"}, None),
+]
+
+def test_save_survey_normalises_confidence():
+    db = SessionLocal()
+    try:
+        farmer = User(username="survey_confidence", email="survey_confidence@example.com", password_hash="x",
+                      full_name="Survey Confidence", role=UserRole.FARMER)
+        db.add(farmer)
+        db.commit()
+        assert save_survey(db, farmer.id, ODD_CONFIDENCES) == 3
+        db.commit()
+        scores = db.query(DiseaseDetection.confidence_score).filter(
+            DiseaseDetection.user_id == farmer.id
+        ).order_by(DiseaseDetection.id).all()
+        assert [s for s, in scores] == [0.0, 0.85, 0.0]
+    finally:
+        db.close()
+
+def test_survey_table_normalises_confidence():
+    pytest.importorskip("streamlit_camera_input_live")
+    from pages.disease_detection import survey_table
+
+    table = survey_table(ODD_CONFIDENCES)
+
+    assert list(table["Confidence"]) == ["0%", "85%", "0%"]
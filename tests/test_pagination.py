@@ -0,0 +1,54 @@
+import os
+from streamlit.testing.v1 import AppTest
+from database import SessionLocal, User, UserRole
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def numbers_page():
+    import streamlit as st
+    from pagination import paginate_with, pagination_controls
+
+    search = st.text_input("Search")
+    matches = [n for n in range(100) if search in str(n)]
+
+    def fetch_page(page_size, after):
+        start = after or 0
+        end = start + page_size
+        return matches[start:end], end if end < len(matches) else None
+
+    st.session_state.shown = paginate_with(fetch_page, "numbers", filters=search)
+    pagination_controls("numbers")
+
+def pagers(app):
+    return sorted(key for key in app.session_state.filtered_state if key.endswith("_pager"))
+
+def test_changing_filters_restarts_the_list_in_the_same_pager():
+    app = AppTest.from_function(numbers_page)
+    app.run()
+    next(b for b in app.button if b.label == "Older ➡️").click().run()
+    assert app.session_state.shown[0] == 25
+
+    app.text_input[0].set_value("1").run()
+    assert app.session_state.shown[:3] == [1, 10, 11]
+    assert app.session_state["numbers_pager"]["cursors"] == [None]
+    assert pagers(app) == ["numbers_pager"]
+
+def test_user_search_does_not_add_pager_state():
+    db = SessionLocal()
+    try:
+        admin = User(username="pager_admin", email="pager_admin@example.com", password_hash="x",
+                     full_name="Pager Admin", role=UserRole.ADMIN)
+        db.add(admin)
+        db.commit()
+    finally:
+        db.close()
+
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.session_state["user"] = admin
+    app.session_state["page"] = "user_management"
+    app.run()
+    for search in ("p", "pa", "pager"):
+        app.text_input[0].set_value(search).run()
+        assert not app.exception, [e.value for e in app.exception]
+
+    assert pagers(app) == ["users_pager"]
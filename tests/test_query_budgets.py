@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from streamlit.testing.v1 import AppTest
+from database import SessionLocal, engine, Comment, CommunityPost, Order, OrderItem, OrderStatus, Product, User, UserRole
+from query_stats import PAGE_BUDGETS, assert_max_queries, count_queries
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def add_products(db, agrovet):
+    products = [
+        Product(agrovet_id=agrovet.id, name=f"Budget Product {i}", category="Seeds",
+                price=5.0 + i, stock_quantity=100, is_active=True)
+        for i in range(3)
+    ]
+    db.add_all(products)
+    db.flush()
+    return products
+
+def add_orders(db, farmer, agrovet, count):
+    """count orders from farmer to agrovet, each with a line for every product"""
+    products = add_products(db, agrovet)
+    statuses = list(OrderStatus)
+    start = datetime.utcnow() - timedelta(days=count)
+    for i in range(count):
+        order = Order(farmer_id=farmer.id, agrovet_id=agrovet.id, status=statuses[i % len(statuses)],
+                      total_amount=0, delivery_address="Plot 7", created_at=start + timedelta(days=i))
+        db.add(order)
+        db.flush()
+        for product in products:
+            db.add(OrderItem(order_id=order.id, product_id=product.id, quantity=2,
+                             unit_price=product.price, subtotal=2 * product.price))
+            order.total_amount += 2 * product.price
+    db.commit()
+
+def add_posts(db, author, commenter, count):
+    """count community posts by author, each with two comments by commenter"""
+    start = datetime.utcnow() - timedelta(days=count)
+    for i in range(count):
+        post = CommunityPost(author_id=author.id, title=f"Budget Post {i}", content="Maize rust again",
+                             category="Question", created_at=start + timedelta(days=i))
+        db.add(post)
+        db.flush()
+        for j in range(2):
+            db.add(Comment(post_id=post.id, author_id=commenter.id, content=f"Reply {j}",
+                           created_at=post.created_at + timedelta(hours=j + 1)))
+    db.commit()
+
+@pytest.fixture(scope="module")
+def shop():
+    db = SessionLocal()
+    try:
+        def user(name, role):
+            account = User(username=name, email=f"{name}@example.com", password_hash="x",
+                           full_name=name.replace("_", " ").title(), role=role)
+            db.add(account)
+            return account
+
+        users = {
+            "few": user("budget_farmer_few", UserRole.FARMER),
+            "many": user("budget_farmer_many", UserRole.FARMER),
+            "agrovet_few": user("budget_agrovet_few", UserRole.AGROVET),
+            "agrovet_many": user("budget_agrovet_many", UserRole.AGROVET),
+            "admin": user("budget_admin", UserRole.ADMIN),
+        }
+        db.commit()
+
+        # One order per status at least, so no tab of the small lists is empty
+        add_orders(db, users["few"], users["agrovet_few"], len(OrderStatus))
+        add_orders(db, users["many"], users["agrovet_many"], 25)
+        add_posts(db, users["many"], users["few"], 30)
+        return users
+    finally:
+        db.close()
+
+def render(page, user, page_size=None):
+    """
+    Render page as user once to warm up (with every list showing page_size
+    rows per page, if given), then return the app ready for a measured rerun
+    """
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.session_state["user"] = user
+    app.session_state["page"] = page
+    app.run()
+    if page_size is not None:
+        for box in app.selectbox:
+            if box.label == "Rows per page":
+                box.set_value(page_size)
+        app.run()
+    assert not app.exception, [e.value for e in app.exception]
+    return app
+
+def rows_shown(app):
+    """Orders and posts are each rendered with one expander"""
+    return len(app.expander)
+
+@pytest.mark.parametrize("page, who", [
+    ("my_orders", "many"),
+    ("all_orders", "admin"),
+    ("agrovet_orders", "agrovet_many"),
+    ("community", "few"),
+])
+def test_page_stays_within_query_budget(shop, page, who):
+    app = render(page, shop[who])
+    with assert_max_queries(engine, PAGE_BUDGETS[page][0]):
+        app.run()
+    assert not app.exception
+    assert rows_shown(app) > 0
+
+@pytest.mark.parametrize("page, few, many", [
+    ("my_orders", "few", "many"),
+    ("agrovet_orders", "agrovet_few", "agrovet_many"),
+    # Every admin and farmer sees the same lists, so these grow with page size
+    ("all_orders", "admin", "admin"),
+    ("community", "few", "few"),
+])
+def test_query_count_does_not_grow_with_rows(shop, page, few, many):
+    counts, shown = {}, {}
+    for label, who, page_size in (("few", few, 10), ("many", many, 100)):
+        app = render(page, shop[who], page_size)
+        with count_queries(engine) as counter:
+            app.run()
+        counts[label] = counter.count
+        shown[label] = rows_shown(app)
+
+    assert 0 < shown["few"] < shown["many"], shown
+    assert counts["many"] == counts["few"], counts
@@ -0,0 +1,36 @@
+from checkout import create_order
+from database import DailySales, Order, OrderStatus, Product, SessionLocal, User, UserRole
+from sales_rollup import record_status_change
+
+def test_cancelling_after_recategorizing_reverses_the_original_rows():
+    db = SessionLocal()
+    try:
+        agrovet = User(username="rollup_agrovet", email="rollup_agrovet@example.com", password_hash="x",
+                       full_name="Rollup Agrovet", role=UserRole.AGROVET)
+        farmer = User(username="rollup_farmer", email="rollup_farmer@example.com", password_hash="x",
+                      full_name="Rollup Farmer", role=UserRole.FARMER)
+        db.add_all([agrovet, farmer])
+        db.flush()
+        product = Product(agrovet_id=agrovet.id, name="Urea 50kg", category="Seeds",
+                          price=40.0, stock_quantity=10, is_active=True)
+        db.add(product)
+        db.commit()
+
+        order_id = create_order(db, [{"id": product.id, "price": product.price, "quantity": 2}],
+                                farmer_id=farmer.id, agrovet_id=agrovet.id, status=OrderStatus.COMPLETED, total_amount=80.0)
+        db.commit()
+
+        product.category = "Fertilizers"
+        db.commit()
+
+        order = db.get(Order, order_id)
+        order.status = OrderStatus.CANCELLED
+        record_status_change(db, order, OrderStatus.COMPLETED)
+        db.commit()
+
+        rows = db.query(DailySales.category, DailySales.revenue, DailySales.units_sold).filter(
+            DailySales.product_id == product.id
+        ).all()
+        assert rows == [("Seeds", 0.0, 0)]
+    finally:
+        db.close()